@@ -1,5 +1,5 @@
 from pacai.agents.capture.capture import CaptureAgent
-import random
+from pacai.student import alphaBeta
 
 def createTeam(firstIndex, secondIndex, isRed,
         first = 'pacai.student.minmax.MinMaxAgent',
@@ -34,6 +34,7 @@ class MinMaxAgent(CaptureAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index, **kwargs)
         self.treeDepth = 0
+        self.engine = alphaBeta.AlphaBetaSearch(self.evalFunction, self.treeDepth)
 
     def registerInitialState(self, gameState):
         """
@@ -50,6 +51,9 @@ class MinMaxAgent(CaptureAgent):
     CaptureAgent calls MinMaxAgent at each step.
     """
     def chooseAction(self, gameState):
+        self.engine.newSearch()
+        self.engine.depth = self.getTreeDepth()
+        self.engine.setTurnOrder(self.index, self.getOpponents(gameState))
         a = self.value(gameState, 0)
 
         return a
@@ -138,82 +142,15 @@ class MinMaxAgent(CaptureAgent):
 
     """
     MaxValue part of MinMaxAgent. This is concerned with the actions of our agents.
+    The search itself is the shared `pacai.student.alphaBeta.AlphaBetaSearch`.
     """
     def maxValue(self, gameState, currentDepth, alpha = -999999, beta = 999999):
-        # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.evalFunction(gameState), None)
-        # node
-        else:
-            # Get legal moves for this agent
-            legalMoves = gameState.getLegalActions(self.index)
-            if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
-                legalMoves.remove('Stop')
-
-            # Get successor states from legal moves
-            successors = [gameState.generateSuccessor(self.index, action) for action in legalMoves]
-
-            # Send successors to minValue func
-            minPairs = []
-            for s in successors:
-                (v2, a2) = self.minValue(s, currentDepth, alpha=alpha, beta=beta)
-                minPairs.append((v2, a2))
-                alpha = max(alpha, v2)
-                if v2 >= beta:
-                    index = successors.index(s)
-                    return (v2, legalMoves[index])
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
-
-            # Get max of minValues
-            bestScore = max(scores)
-            bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
-            chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
-
-            return (scores[chosenIndex], legalMoves[chosenIndex])
+        return self.engine.maxValue(gameState, currentDepth, alpha, beta)
 
     """
     minValue part of MinMaxAgent. This is concerned with the actions of enemy ghost agents.
     Function will call itself for each enemy ghost (multiple min layers per max layer).
     """
     def minValue(self, gameState, currentDepth, agentNum = 0, alpha = -999999, beta = 999999):
-        # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.evalFunction(gameState), None)
-        # node
-        else:
-            # Get legal moves of ghost agent
-            opponents = self.getOpponents(gameState)    # ghost agents
-            legalMoves = gameState.getLegalActions(opponents[agentNum])
-            if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
-                legalMoves.remove('Stop')
-
-            # Get successor states from legal moves
-            successors = [gameState.generateSuccessor(opponents[agentNum], action)
-                          for action in legalMoves]
-
-            # Send successors to minValue or maxValue func (multiple minValue layers, 1 per ghost)
-            minPairs = []
-            if agentNum == 1:    # all ghosts done
-                for s in successors:
-                    (v2, a2) = self.maxValue(s, currentDepth + 1, alpha=alpha, beta=beta)
-                    minPairs.append((v2, a2))
-                    beta = min(beta, v2)
-                    if v2 >= alpha:
-                        index = successors.index(s)
-                        return (v2, legalMoves[index])
-            else:                                           # more ghosts to be done
-                for s in successors:
-                    (v2, a2) = self.minValue(s, currentDepth, agentNum + 1, alpha=alpha, beta=beta)
-                    minPairs.append((v2, a2))
-                    beta = min(beta, v2)
-                    if v2 >= alpha:
-                        index = successors.index(s)
-                        return (v2, legalMoves[index])
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
-
-            # Get min of maxValues (or previous layers of minValue)
-            bestScore = min(scores)
-            bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
-            chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
-
-            return (scores[chosenIndex], legalMoves[chosenIndex])
+        opponents = self.getOpponents(gameState)    # ghost agents
+        return self.engine.minValue(gameState, currentDepth, opponents[agentNum], alpha, beta)
@@ -0,0 +1,287 @@
+"""
+Depth-limited alpha-beta search, shared by `pacai.student.multiagents.AlphaBetaAgent`
+and the capture agents in `pacai.student.myTeam`.
+"""
+
+import random
+import time
+
+from pacai.core import distance
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.student import searchState
+from pacai.student import transposition
+
+class SearchTimeout(Exception):
+    """
+    Raised from inside a search once the move time is up.
+    """
+
+    pass
+
+class AlphaBetaSearch(object):
+    """
+    Alpha-beta over a turn order where `maxAgent` maximizes and each agent in `minAgents`
+    minimizes, moving in order (max, min 1, min 2, ..., max, ...).
+    A ply of depth is used up every time the turn comes back around to `maxAgent`.
+
+    Values are fail-soft: a value returned for an (alpha, beta) window is exact if it falls
+    inside the window (ends included), an upper bound on the true value if it is below alpha,
+    and a lower bound if it is above beta.
+    Cutoffs only happen on strict inequality, so that every root move tied for the best value
+    has an exact value, and picking randomly among them is safe.
+
+    `evaluate(gameState)` scores the leaves. With a `table` (and its `hasher`, see
+    `pacai.student.transposition`), results are stored and reused across the search,
+    and with an `evaluationCache` too (a `pacai.student.transposition.EvaluationCache`),
+    leaves are looked up there (by their hash) before they are evaluated.
+    Moves are tried in order: the table's best move, this ply's killer moves,
+    the history table, and then `AlphaBetaSearch.staticScore`.
+    `enterNode()` is called at every inner node; by default it counts `nodes`,
+    and raises `SearchTimeout` once `deadline` (a `time.perf_counter()` value) has passed.
+    Moves are made with `pacai.student.searchState.makeMove`, so a search started on a
+    `pacai.student.searchState.SearchState` plays (and takes back) every move in place.
+    """
+
+    def __init__(self, evaluate, depth, table = None, hasher = None, enterNode = None,
+            evaluationCache = None):
+        self.evaluate = evaluate
+        self.depth = depth
+        self.table = table
+        self.hasher = hasher
+        self.evaluationCache = evaluationCache
+        self.enterNode = enterNode
+        if enterNode is None:
+            self.enterNode = self._enterNode
+
+        self.deadline = None
+        self.nodes = 0
+
+        self.killers = {}                           # (currentDepth, agentIndex) : [move, move]
+        self.history = {}                           # (agentIndex, position, move) : cutoff score
+
+        self.maxAgent = 0
+        self._nextAgent = {0: 0}
+
+    def setTurnOrder(self, maxAgent, minAgents):
+        self.maxAgent = maxAgent
+
+        order = [maxAgent] + list(minAgents)
+        self._nextAgent = {agent: order[(i + 1) % len(order)] for (i, agent) in enumerate(order)}
+
+    def newSearch(self):
+        """
+        Start the search for a new move.
+        Killers are per ply, so they only make sense within one move's search,
+        but the history is kept (fading) from one move to the next.
+        """
+
+        self.nodes = 0
+        self.killers = {}
+        for key in list(self.history):
+            self.history[key] //= 2
+            if self.history[key] == 0:
+                del self.history[key]
+
+    def _enterNode(self):
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def search(self, gameState):
+        """
+        Returns (value, move) for `self.maxAgent` to move in `gameState`.
+        """
+
+        return self.maxValue(gameState, 0)
+
+    def maxValue(self, gameState, currentDepth, alpha = float('-inf'), beta = float('inf'),
+            stateHash = None):
+        # terminal (including win/lose states)
+        if currentDepth == self.depth or gameState.isWin() or gameState.isLose():
+            return (self._leafValue(gameState, stateHash), None)
+
+        self.enterNode()
+        (stateHash, value, tableMove) = self._probe(gameState, stateHash, self.maxAgent,
+                currentDepth, alpha, beta)
+        if value is not None:
+            return (value, tableMove)
+
+        window = (alpha, beta)
+        moves = self.orderedMoves(gameState, self.maxAgent, currentDepth, tableMove)
+        bestValue = float('-inf')
+        bestMoves = []
+        for action in moves:
+            (v, a) = self._childValue(gameState, action, currentDepth, self.maxAgent, alpha, beta,
+                    stateHash)
+
+            if v > beta:                            # the min above already has something better
+                self.recordCutoff(gameState, self.maxAgent, currentDepth, action)
+                self._store(stateHash, currentDepth, v, action, *window)
+                return (v, action)
+
+            if v > bestValue:
+                (bestValue, bestMoves) = (v, [action])
+            elif v == bestValue:
+                bestMoves.append(action)
+
+            alpha = max(alpha, v)
+
+        move = random.choice(bestMoves)             # pick randomly among the best
+        self._store(stateHash, currentDepth, bestValue, move, *window)
+        return (bestValue, move)
+
+    def minValue(self, gameState, currentDepth, agentIndex, alpha = float('-inf'),
+            beta = float('inf'), stateHash = None):
+        # terminal (including win/lose states)
+        if currentDepth == self.depth or gameState.isWin() or gameState.isLose():
+            return (self._leafValue(gameState, stateHash), None)
+
+        self.enterNode()
+        (stateHash, value, tableMove) = self._probe(gameState, stateHash, agentIndex,
+                currentDepth, alpha, beta)
+        if value is not None:
+            return (value, tableMove)
+
+        window = (alpha, beta)
+        moves = self.orderedMoves(gameState, agentIndex, currentDepth, tableMove)
+        bestValue = float('inf')
+        bestMoves = []
+        for action in moves:
+            (v, a) = self._childValue(gameState, action, currentDepth, agentIndex, alpha, beta,
+                    stateHash)
+
+            if v < alpha:                           # the max above already has something better
+                self.recordCutoff(gameState, agentIndex, currentDepth, action)
+                self._store(stateHash, currentDepth, v, action, *window)
+                return (v, action)
+
+            if v < bestValue:
+                (bestValue, bestMoves) = (v, [action])
+            elif v == bestValue:
+                bestMoves.append(action)
+
+            beta = min(beta, v)
+
+        move = random.choice(bestMoves)             # pick randomly among the best
+        self._store(stateHash, currentDepth, bestValue, move, *window)
+        return (bestValue, move)
+
+    def _childValue(self, gameState, action, currentDepth, agentIndex, alpha, beta, stateHash):
+        """
+        Search the successor after `agentIndex` makes `action`, with whoever moves next
+        (see `pacai.student.searchState.makeMove`).
+        """
+
+        nextAgent = self._nextAgent[agentIndex]
+        hasher = None
+        if self.table is not None:
+            hasher = self.hasher
+
+        (successor, childHash) = searchState.makeMove(gameState, agentIndex, action, nextAgent,
+                stateHash, hasher)
+        try:
+            if nextAgent == self.maxAgent:          # everyone moved, one ply done
+                return self.maxValue(successor, currentDepth + 1, alpha, beta, childHash)
+
+            return self.minValue(successor, currentDepth, nextAgent, alpha, beta, childHash)
+        finally:
+            searchState.undoMove(gameState)
+
+    def _leafValue(self, gameState, stateHash):
+        if self.evaluationCache is None or stateHash is None:
+            return self.evaluate(gameState)
+
+        return self.evaluationCache.value(self.evaluate, gameState, stateHash)
+
+    def _probe(self, gameState, stateHash, agentIndex, currentDepth, alpha, beta):
+        if self.table is None:
+            return (None, None, None)
+
+        if stateHash is None:
+            stateHash = self.hasher.hash(gameState, agentIndex)
+
+        (value, entry) = self.table.lookup(stateHash, self.depth - currentDepth, alpha, beta)
+        if entry is None:
+            return (stateHash, None, None)
+
+        return (stateHash, value, entry.move)
+
+    def _store(self, stateHash, currentDepth, value, move, alpha, beta):
+        if self.table is not None:
+            self.table.store(stateHash, self.depth - currentDepth, value,
+                    transposition.boundType(value, alpha, beta), move)
+
+    def legalMoves(self, gameState, agentIndex):
+        """
+        The moves searched for an agent: its legal actions, without 'Stop'
+        (unless there is nothing else).
+        """
+
+        legalMoves = gameState.getLegalActions(agentIndex)
+        if Directions.STOP in legalMoves and len(legalMoves) > 1:
+            legalMoves.remove(Directions.STOP)
+
+        return legalMoves
+
+    def orderedMoves(self, gameState, agentIndex, currentDepth, tableMove):
+        """
+        The legal moves, sorted so that the ones likely to cause a cutoff come first:
+        the table's best move, then this ply's killer moves (moves that caused a cutoff in a
+        sibling), then by the history table (how often and how deep a move caused cutoffs
+        from this position), and last by `AlphaBetaSearch.staticScore`.
+        """
+
+        position = gameState.getAgentPosition(agentIndex)
+        killers = self.killers.get((currentDepth, agentIndex), [])
+
+        def priority(action):
+            if action == tableMove:
+                return (3, 0, 0)
+
+            if action in killers:
+                return (2, -killers.index(action), 0)
+
+            return (1, self.history.get((agentIndex, position, action), 0),
+                    self.staticScore(gameState, agentIndex, position, action))
+
+        return sorted(self.legalMoves(gameState, agentIndex), key = priority, reverse = True)
+
+    def staticScore(self, gameState, agentIndex, position, action):
+        """
+        How good a move looks for the agent making it, without generating the successor.
+        The max agent likes moving onto food and capsules, the min agents like getting closer
+        to it (or farther, when scared).
+        """
+
+        if position is None:                        # not observed
+            return 0
+
+        (dx, dy) = Actions.directionToVector(action)
+        (x, y) = (int(position[0] + dx), int(position[1] + dy))
+        if agentIndex == self.maxAgent:
+            score = 0
+            if gameState.hasFood(x, y):
+                score += 1
+            if (x, y) in gameState.getCapsules():
+                score += 2
+            return score
+
+        target = gameState.getAgentPosition(self.maxAgent)
+        if target is None:
+            return 0
+
+        d = distance.manhattan((x, y), target)
+        if gameState.getAgentState(agentIndex).isScared():
+            return d
+        return -d
+
+    def recordCutoff(self, gameState, agentIndex, currentDepth, move):
+        killers = self.killers.setdefault((currentDepth, agentIndex), [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+        key = (agentIndex, gameState.getAgentPosition(agentIndex), move)
+        depth = self.depth - currentDepth
+        self.history[key] = self.history.get(key, 0) + depth * depth
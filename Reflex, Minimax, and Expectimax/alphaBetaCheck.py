@@ -0,0 +1,167 @@
+"""
+Check `pacai.student.alphaBeta.AlphaBetaSearch` against plain minimax on random game trees.
+
+For every tree, the alpha-beta root value has to equal the minimax value,
+the move it picks has to be worth that value,
+and searches with random (alpha, beta) windows have to return exact values inside the window
+and correct bounds outside of it.
+Node counts for both searches are reported, so the pruning savings can be tracked too.
+```
+python -m pacai.student.alphaBetaCheck --trees 200 --depth 3 --agents 3
+```
+"""
+
+import argparse
+import random
+import sys
+
+from pacai.student import alphaBeta
+
+DEFAULT_TREES = 100
+DEFAULT_DEPTH = 3
+DEFAULT_AGENTS = 3
+DEFAULT_BRANCHING = 4
+
+# Chance that a (non-root) state ends the game.
+TERMINAL_PROBABILITY = 0.05
+
+class RandomTreeState(object):
+    """
+    A stand-in for a game state: agents take turns in a game tree with random branching and
+    random (integer, so there are plenty of ties) leaf values.
+    Everything about a state is drawn from the seed and the moves that led to it,
+    so the same state always looks the same to every search.
+    """
+
+    def __init__(self, seed, maxBranching, path = ()):
+        self.seed = seed
+        self.maxBranching = maxBranching
+        self.path = path
+
+        rng = random.Random('%d:%s' % (seed, '/'.join(path)))
+        self._branching = rng.randint(1, maxBranching)
+        self._terminal = len(path) > 0 and rng.random() < TERMINAL_PROBABILITY
+        self._win = self._terminal and rng.random() < 0.5
+        self._value = rng.randint(-20, 20)
+
+    def getLegalActions(self, agentIndex = 0):
+        return ['%d.%d' % (agentIndex, i) for i in range(self._branching)]
+
+    def generateSuccessor(self, agentIndex, action):
+        return RandomTreeState(self.seed, self.maxBranching, self.path + (action,))
+
+    def isWin(self):
+        return self._win
+
+    def isLose(self):
+        return self._terminal and not self._win
+
+    def getAgentPosition(self, agentIndex):
+        return None
+
+    def getValue(self):
+        if self.isWin():
+            return 100
+        if self.isLose():
+            return -100
+
+        return self._value
+
+def minimax(state, depth, agentIndex, numAgents, counter):
+    """
+    Plain minimax (agent 0 maximizes), counting inner nodes in counter[0].
+    """
+
+    if depth == 0 or state.isWin() or state.isLose():
+        return state.getValue()
+
+    counter[0] += 1
+    nextAgent = (agentIndex + 1) % numAgents
+    nextDepth = depth - 1 if nextAgent == 0 else depth
+    values = [minimax(state.generateSuccessor(agentIndex, action), nextDepth, nextAgent,
+            numAgents, counter) for action in state.getLegalActions(agentIndex)]
+
+    if agentIndex == 0:
+        return max(values)
+    return min(values)
+
+def checkTree(seed, depth, numAgents, maxBranching, rng):
+    """
+    Returns (problems, minimax nodes, alpha-beta nodes) for one random tree.
+    """
+
+    root = RandomTreeState(seed, maxBranching)
+    engine = alphaBeta.AlphaBetaSearch(RandomTreeState.getValue, depth)
+    engine.setTurnOrder(0, range(1, numAgents))
+    problems = []
+
+    counter = [0]
+    expected = minimax(root, depth, 0, numAgents, counter)
+
+    engine.newSearch()
+    (value, move) = engine.search(root)
+    searchNodes = engine.nodes
+    if value != expected:
+        problems.append('tree %d: alpha-beta value %s, minimax %s' % (seed, value, expected))
+
+    nextDepth = depth - 1 if numAgents == 1 else depth
+    moveValue = minimax(root.generateSuccessor(0, move), nextDepth, 1 % numAgents, numAgents,
+            [0])
+    if moveValue != expected:
+        problems.append('tree %d: move %s is worth %s, not %s' % (seed, move, moveValue, expected))
+
+    # Fail-soft bounds for a random window.
+    alpha = rng.randint(-25, 20)
+    beta = rng.randint(alpha, 25)
+    engine.newSearch()
+    (value, move) = engine.maxValue(root, 0, alpha, beta)
+    if ((alpha <= value <= beta and value != expected)
+            or (value < alpha and expected > value)
+            or (value > beta and expected < value)):
+        problems.append('tree %d: window (%d, %d) gave %s, true value %s'
+                % (seed, alpha, beta, value, expected))
+
+    return (problems, counter[0], searchNodes)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description = __doc__.strip().split('\n')[0])
+    parser.add_argument('--trees', type = int, default = DEFAULT_TREES,
+            help = 'random trees to check (default: %(default)s)')
+    parser.add_argument('--depth', type = int, default = DEFAULT_DEPTH,
+            help = 'search depth, in plies of every agent (default: %(default)s)')
+    parser.add_argument('--agents', type = int, default = DEFAULT_AGENTS,
+            help = 'agents, the first maximizing and the rest minimizing (default: %(default)s)')
+    parser.add_argument('--branching', type = int, default = DEFAULT_BRANCHING,
+            help = 'most moves at a node (default: %(default)s)')
+    parser.add_argument('--seed', type = int, default = 0,
+            help = 'seed of the first tree (default: %(default)s)')
+    options = parser.parse_args(argv)
+
+    rng = random.Random(options.seed)
+    problems = []
+    minimaxNodes = 0
+    alphaBetaNodes = 0
+    for seed in range(options.seed, options.seed + options.trees):
+        (treeProblems, treeMinimaxNodes, treeAlphaBetaNodes) = checkTree(seed, options.depth,
+                options.agents, options.branching, rng)
+        problems += treeProblems
+        minimaxNodes += treeMinimaxNodes
+        alphaBetaNodes += treeAlphaBetaNodes
+
+    print('%d trees (depth %d, %d agents, up to %d moves per node)'
+            % (options.trees, options.depth, options.agents, options.branching))
+    print('    minimax nodes:    %10d' % (minimaxNodes))
+    print('    alpha-beta nodes: %10d (%.1f%% of minimax)'
+            % (alphaBetaNodes, 100.0 * alphaBetaNodes / max(1, minimaxNodes)))
+
+    if problems:
+        print('\n%d problem(s):' % (len(problems)))
+        for problem in problems:
+            print('    ' + problem)
+        return 1
+
+    print('\nAll values, moves, and bounds agree with minimax.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
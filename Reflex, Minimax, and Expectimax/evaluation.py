@@ -0,0 +1,140 @@
+"""
+Fast food and ghost distances for the evaluation functions in `pacai.student.multiagents`.
+
+Game states copy their food grid only when a pellet gets eaten,
+so every state below a move that ate nothing shares its parent's grid.
+What only depends on the food (the pellets, how many, and how far out they reach)
+is computed once per grid and kept in a `FoodSummary`, looked up by the grid itself,
+so a leaf evaluation costs a few lookups plus one pass over the ghosts,
+instead of a pass over every pellet.
+"""
+
+import collections
+
+from pacai.core import distance
+
+DEFAULT_MAX_SUMMARIES = 4096
+
+class FoodSummary(object):
+    """
+    The pellets of one food grid, and the extremes of x + y and x - y over them:
+    the Manhattan distance to the farthest pellet from any position is
+    max(x + y - min(x + y), max(x + y) - (x + y), x - y - min(x - y), max(x - y) - (x - y)),
+    so it takes four subtractions instead of a pass over every pellet.
+    """
+
+    __slots__ = ('food', 'positions', 'count', 'extremes', 'farthestMaze')
+
+    def __init__(self, food):
+        self.food = food                            # keeps the grid (and so its id) alive
+        self.positions = food.asList()
+        self.count = len(self.positions)
+        self.farthestMaze = {}                      # position : maze distance to farthest pellet
+
+        self.extremes = None
+        if self.count > 0:
+            sums = [x + y for (x, y) in self.positions]
+            differences = [x - y for (x, y) in self.positions]
+            self.extremes = (min(sums), max(sums), min(differences), max(differences))
+
+    def farthestManhattan(self, position):
+        (x, y) = position
+        (minSum, maxSum, minDifference, maxDifference) = self.extremes
+
+        return max(x + y - minSum, maxSum - (x + y), x - y - minDifference, maxDifference - (x - y))
+
+class Evaluator(object):
+    """
+    Food and ghost distances for states of a game, by Manhattan distance,
+    or with `useMazeDistances`, by maze distance
+    (`pacai.student.mazeDistances`, falling back to Manhattan distance for ghosts standing
+    between cells).
+    `pacai.student.mazeDistances` comes with the Search project, so it is only imported
+    once maze distances are first needed: without it, only the maze evaluator is unusable.
+
+    Up to `maxSummaries` `FoodSummary`s are kept, the least recently built dropped first.
+    `hits` and `builds` count how often a summary was reused or had to be built.
+    """
+
+    def __init__(self, useMazeDistances = False, maxSummaries = DEFAULT_MAX_SUMMARIES):
+        self.useMazeDistances = useMazeDistances
+        self.maxSummaries = maxSummaries
+
+        self.hits = 0
+        self.builds = 0
+
+        self._summaries = collections.OrderedDict()  # id(food grid) : FoodSummary
+        self._walls = None
+        self._distances = None
+
+    def foodSummary(self, gameState):
+        food = gameState.getFood()
+        summary = self._summaries.get(id(food))
+        if summary is not None and summary.food is food:
+            self.hits += 1
+            return summary
+
+        self.builds += 1
+        summary = FoodSummary(food)
+        self._summaries[id(food)] = summary
+        if len(self._summaries) > self.maxSummaries:
+            self._summaries.popitem(last = False)
+
+        return summary
+
+    def farthestFood(self, gameState, summary):
+        """
+        The distance from Pacman to the farthest pellet of `summary` (which has some).
+        """
+
+        position = gameState.getPacmanPosition()
+        if not self.useMazeDistances:
+            return summary.farthestManhattan(position)
+
+        farthest = summary.farthestMaze.get(position)
+        if farthest is None:
+            distances = self.mazeDistances(gameState)
+            index = distances.getIndex(position)
+            farthest = max([distances.getIndexDistance(index, distances.getIndex(food))
+                    for food in summary.positions])
+            summary.farthestMaze[position] = farthest
+
+        return farthest
+
+    def ghostDistances(self, gameState):
+        """
+        The distance from Pacman to every ghost.
+        """
+
+        position = gameState.getPacmanPosition()
+        if not self.useMazeDistances:
+            return [distance.manhattan(position, ghost) for ghost in gameState.getGhostPositions()]
+
+        distances = self.mazeDistances(gameState)
+        index = distances.getIndex(position)
+        ghostDistances = []
+        for ghost in gameState.getGhostPositions():
+            ghostIndex = distances.getIndex(ghost)
+            if index is None or ghostIndex is None:
+                ghostDistances.append(distance.manhattan(position, ghost))
+            else:
+                ghostDistances.append(distances.getIndexDistance(index, ghostIndex))
+
+        return ghostDistances
+
+    def mazeDistances(self, gameState):
+        walls = gameState.getWalls()
+        if walls is not self._walls:
+            from pacai.student import mazeDistances
+
+            self._walls = walls
+            self._distances = mazeDistances.getMazeDistances(walls)
+
+        return self._distances
+
+    def hitRate(self):
+        lookups = self.hits + self.builds
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
@@ -0,0 +1,301 @@
+"""
+Depth-limited expectimax with chance node pruning, for `pacai.student.multiagents.ExpectimaxAgent`.
+
+Chance nodes are pruned Star1-style (Ballard, "The *-minimax search procedure for trees
+containing chance nodes"): given bounds on the evaluation function, a chance node's value is
+bounded before all of its children are searched, so it can be cut off once that bound falls
+outside the (alpha, beta) window handed down from the max nodes above.
+
+Star2 (probing one move of each max child for a lower bound) is left out:
+with Pacman as the only maximizer, beta is never finite, so lower bounds never cut anything.
+"""
+
+import random
+import time
+
+from pacai.core import distance
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.student import alphaBeta
+from pacai.student import searchState
+from pacai.student import transposition
+
+def uniformGhostModel(gameState, agentIndex, moves):
+    """
+    Every move is equally likely.
+    """
+
+    return [1.0 / len(moves)] * len(moves)
+
+class BeelineGhostModel(object):
+    """
+    Ghosts that usually move straight towards Pacman (or away from him, when scared),
+    like `pacai.agents.ghost.directional.DirectionalGhost`:
+    with probability `attack` (`flee` when scared) one of the moves that gets closest to
+    (farthest from) Pacman, and any move otherwise.
+    """
+
+    def __init__(self, attack = 0.8, flee = 0.8):
+        self.attack = attack
+        self.flee = flee
+
+    def __call__(self, gameState, agentIndex, moves):
+        agentState = gameState.getAgentState(agentIndex)
+        (x, y) = agentState.getPosition()
+        target = gameState.getPacmanPosition()
+
+        speed = 1.0
+        if agentState.isScared():
+            speed = 0.5
+
+        distances = []
+        for move in moves:
+            (dx, dy) = Actions.directionToVector(move, speed)
+            distances.append(distance.manhattan((x + dx, y + dy), target))
+
+        bestDistance = min(distances)
+        bestProbability = self.attack
+        if agentState.isScared():
+            bestDistance = max(distances)
+            bestProbability = self.flee
+
+        numBest = distances.count(bestDistance)
+        return [(1.0 - bestProbability) / len(moves)
+                + (bestProbability / numBest if d == bestDistance else 0.0) for d in distances]
+
+GHOST_MODELS = {
+    'uniform': uniformGhostModel,
+    'beeline': BeelineGhostModel(),
+}
+
+class ExpectimaxSearch(object):
+    """
+    Expectimax where agent 0 (Pacman) maximizes, and every other agent moves at random, in order,
+    with the probabilities `ghostModel(gameState, agentIndex, moves)` (uniform by default).
+    A ply of depth is used up every time the turn comes back around to Pacman.
+
+    `bounds(gameState, plies)` gives (low, high): bounds on what `evaluate` can score for any
+    state reachable from `gameState` in `plies` more plies.
+    With it, a chance node searches each child (most likely first) within the window that
+    would still let the node land inside its own (alpha, beta) window, assuming `high` (`low`)
+    for the children not searched yet, and stops as soon as it cannot.
+    Bounds are only computed once a window is finite, and once per ply: every chance node
+    below a max node (until Pacman moves again) uses the bounds of that max node.
+    Without `bounds`, every chance node is searched in full.
+
+    Values are fail-soft, with the conventions of `pacai.student.alphaBeta.AlphaBetaSearch`:
+    exact inside the window, an upper bound below alpha, and a lower bound above beta.
+    The `table`, `hasher`, `evaluationCache`, `enterNode`, `deadline`, and searches started on
+    a `pacai.student.searchState.SearchState` work the same way too.
+    """
+
+    def __init__(self, evaluate, depth, bounds = None, ghostModel = None, table = None,
+            hasher = None, enterNode = None, evaluationCache = None):
+        self.evaluate = evaluate
+        self.depth = depth
+        self.evaluationCache = evaluationCache
+        self.bounds = bounds
+        self.ghostModel = ghostModel
+        if ghostModel is None:
+            self.ghostModel = uniformGhostModel
+
+        self.table = table
+        self.hasher = hasher
+
+        self.enterNode = enterNode
+        if enterNode is None:
+            self.enterNode = self._enterNode
+
+        self.deadline = None
+        self.nodes = 0
+        self.cutoffs = 0                            # chance nodes cut off by their bounds
+
+    def newSearch(self):
+        self.nodes = 0
+        self.cutoffs = 0
+
+    def _enterNode(self):
+        self.nodes += 1
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            raise alphaBeta.SearchTimeout()
+
+    def search(self, gameState):
+        """
+        Returns (value, move) for Pacman to move in `gameState`.
+        """
+
+        return self.maxValue(gameState, 0)
+
+    def maxValue(self, gameState, currentDepth, alpha = float('-inf'), beta = float('inf'),
+            stateHash = None):
+        # terminal (including win/lose states)
+        if currentDepth == self.depth or gameState.isWin() or gameState.isLose():
+            return (self._leafValue(gameState, stateHash), None)
+
+        self.enterNode()
+        (stateHash, value, tableMove) = self._probe(gameState, stateHash, 0, currentDepth,
+                alpha, beta)
+        if value is not None:
+            return (value, tableMove)
+
+        window = (alpha, beta)
+        plyBounds = None
+        bestValue = float('-inf')
+        bestMoves = []
+        for action in self.pacmanMoves(gameState, tableMove):
+            if plyBounds is None and self.bounds is not None and alpha > float('-inf'):
+                plyBounds = self.bounds(gameState, self.depth - currentDepth)
+
+            v = self._childValue(gameState, action, 0, currentDepth, alpha, beta, stateHash,
+                    plyBounds)
+
+            if v > beta:                            # the chance node above is already settled
+                self._store(stateHash, currentDepth, v, action, *window)
+                return (v, action)
+
+            if v > bestValue:
+                (bestValue, bestMoves) = (v, [action])
+            elif v == bestValue:
+                bestMoves.append(action)
+
+            alpha = max(alpha, v)
+
+        move = random.choice(bestMoves)             # pick randomly among the best
+        self._store(stateHash, currentDepth, bestValue, move, *window)
+        return (bestValue, move)
+
+    def expValue(self, gameState, currentDepth, agentIndex, alpha = float('-inf'),
+            beta = float('inf'), stateHash = None, plyBounds = None):
+        # terminal (including win/lose states)
+        if currentDepth == self.depth or gameState.isWin() or gameState.isLose():
+            return (self._leafValue(gameState, stateHash), None)
+
+        self.enterNode()
+        (stateHash, value, tableMove) = self._probe(gameState, stateHash, agentIndex,
+                currentDepth, alpha, beta)
+        if value is not None:
+            return (value, None)
+
+        window = (alpha, beta)
+        moves = self.chanceMoves(gameState, agentIndex)
+
+        if self.bounds is None or (alpha == float('-inf') and beta == float('inf')):
+            value = sum([probability * self._childValue(gameState, action, agentIndex,
+                    currentDepth, stateHash = stateHash, plyBounds = plyBounds)
+                    for (action, probability) in moves])
+            self._store(stateHash, currentDepth, value, None, *window)
+            return (value, None)
+
+        if plyBounds is None:
+            plyBounds = self.bounds(gameState, self.depth - currentDepth)
+        (low, high) = plyBounds
+
+        # Search each child within the window that can still settle this node.
+        searchedSum = 0.0
+        restProbability = 1.0
+        for (action, probability) in moves:
+            restProbability = max(0.0, restProbability - probability)
+
+            childAlpha = (alpha - searchedSum - restProbability * high) / probability
+            childBeta = (beta - searchedSum - restProbability * low) / probability
+            v = self._childValue(gameState, action, agentIndex, currentDepth,
+                    childAlpha, childBeta, stateHash, plyBounds)
+
+            if v < childAlpha or v > childBeta:
+                upper = searchedSum + probability * v + restProbability * high
+                if v < childAlpha and upper < alpha:
+                    return self._cutoff(stateHash, currentDepth, upper, window)
+
+                lower = searchedSum + probability * v + restProbability * low
+                if v > childBeta and lower > beta:
+                    return self._cutoff(stateHash, currentDepth, lower, window)
+
+                # Rounding kept the bound inside the window: get the exact value after all.
+                v = self._childValue(gameState, action, agentIndex, currentDepth,
+                        stateHash = stateHash, plyBounds = plyBounds)
+
+            searchedSum += probability * v
+
+        self._store(stateHash, currentDepth, searchedSum, None, *window)
+        return (searchedSum, None)
+
+    def _cutoff(self, stateHash, currentDepth, value, window):
+        self.cutoffs += 1
+        self._store(stateHash, currentDepth, value, None, *window)
+        return (value, None)
+
+    def _childValue(self, gameState, action, agentIndex, currentDepth,
+            alpha = float('-inf'), beta = float('inf'), stateHash = None, plyBounds = None):
+        """
+        The value of the successor after `agentIndex` makes `action`, with whoever moves next
+        (chance nodes get this ply's bounds, see `pacai.student.searchState.makeMove`).
+        """
+
+        nextAgent = (agentIndex + 1) % gameState.getNumAgents()
+        hasher = None
+        if self.table is not None:
+            hasher = self.hasher
+
+        (successor, childHash) = searchState.makeMove(gameState, agentIndex, action, nextAgent,
+                stateHash, hasher)
+        try:
+            if nextAgent == 0:                      # everyone moved, one ply done
+                return self.maxValue(successor, currentDepth + 1, alpha, beta, childHash)[0]
+
+            return self.expValue(successor, currentDepth, nextAgent, alpha, beta, childHash,
+                    plyBounds)[0]
+        finally:
+            searchState.undoMove(gameState)
+
+    def pacmanMoves(self, gameState, tableMove = None):
+        """
+        Pacman's legal moves, without 'Stop' (unless there is nothing else),
+        and the table's best move first.
+        """
+
+        legalMoves = gameState.getLegalActions(0)
+        if Directions.STOP in legalMoves and len(legalMoves) > 1:
+            legalMoves.remove(Directions.STOP)
+
+        if tableMove in legalMoves:
+            legalMoves.remove(tableMove)
+            legalMoves.insert(0, tableMove)
+
+        return legalMoves
+
+    def chanceMoves(self, gameState, agentIndex):
+        """
+        [(move, probability)] for a ghost, most likely first.
+        """
+
+        legalMoves = gameState.getLegalActions(agentIndex)
+        if Directions.STOP in legalMoves and len(legalMoves) > 1:
+            legalMoves.remove(Directions.STOP)
+
+        moves = list(zip(legalMoves, self.ghostModel(gameState, agentIndex, legalMoves)))
+        moves.sort(key = lambda move: move[1], reverse = True)
+        return [(action, probability) for (action, probability) in moves if probability > 0.0]
+
+    def _leafValue(self, gameState, stateHash):
+        if self.evaluationCache is None or stateHash is None:
+            return self.evaluate(gameState)
+
+        return self.evaluationCache.value(self.evaluate, gameState, stateHash)
+
+    def _probe(self, gameState, stateHash, agentIndex, currentDepth, alpha, beta):
+        if self.table is None:
+            return (None, None, None)
+
+        if stateHash is None:
+            stateHash = self.hasher.hash(gameState, agentIndex)
+
+        (value, entry) = self.table.lookup(stateHash, self.depth - currentDepth, alpha, beta)
+        if entry is None:
+            return (stateHash, None, None)
+
+        return (stateHash, value, entry.move)
+
+    def _store(self, stateHash, currentDepth, value, move, alpha, beta):
+        if self.table is not None:
+            self.table.store(stateHash, self.depth - currentDepth, value,
+                    transposition.boundType(value, alpha, beta), move)
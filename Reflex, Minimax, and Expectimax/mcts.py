@@ -0,0 +1,245 @@
+"""
+Monte Carlo tree search (UCT) for Pacman, used by `pacai.student.multiagents.ContestAgent`.
+
+The tree is open-loop: it only branches on Pacman's moves, and the ghosts' moves are drawn
+from a ghost model (see `pacai.student.expectimax.GHOST_MODELS`) every time a simulation passes
+through a node. Pacman's position only depends on his own moves, so the legal moves at a node
+are always the same, and a node's statistics average over what the ghosts might do.
+That also makes a subtree still valid after the ghosts have actually moved,
+so it is kept as the next move's tree.
+
+Simulations are played on one `pacai.student.searchState.SearchState` per search,
+which every simulation takes back to the root when it is done.
+"""
+
+import math
+import random
+import time
+
+from pacai.core.directions import Directions
+from pacai.student import expectimax
+from pacai.student import searchState
+
+DEFAULT_EXPLORATION = math.sqrt(2)
+DEFAULT_ROLLOUT_DEPTH = 4
+DEFAULT_EPSILON = 0.2
+
+class TreeNode(object):
+    """
+    A node for the sequence of Pacman moves that leads to it.
+    `position` is where Pacman ends up, so a kept subtree can be checked against the game.
+    """
+
+    __slots__ = ('position', 'children', 'untried', 'visits', 'total')
+
+    def __init__(self, position):
+        self.position = position
+        self.children = {}                          # move : TreeNode
+        self.untried = None                         # legal moves not expanded yet
+        self.visits = 0
+        self.total = 0.0
+
+    def mean(self):
+        return self.total / self.visits
+
+class MonteCarloTreeSearch(object):
+    """
+    UCT over Pacman's moves, scored by `evaluate` at the end of every simulation.
+
+    Each simulation goes down the tree by UCB1 (with `exploration` as the constant, on values
+    normalized by the lowest and highest seen in this search), expands one new move,
+    and plays `rolloutDepth` more plies with `rolloutPolicy`:
+    'greedy' moves Pacman to the successor `evaluate` likes best
+    (and at random with probability `epsilon`), 'random' moves him at random (but not back
+    the way he came, if he can help it), which is cheaper but noisier.
+    """
+
+    def __init__(self, evaluate, exploration = DEFAULT_EXPLORATION,
+            rolloutDepth = DEFAULT_ROLLOUT_DEPTH, rolloutPolicy = 'greedy',
+            epsilon = DEFAULT_EPSILON, ghostModel = None, seed = None):
+        self.evaluate = evaluate
+        self.exploration = exploration
+        self.rolloutDepth = rolloutDepth
+        self.rolloutPolicy = rolloutPolicy
+        self.epsilon = epsilon
+
+        self.ghostModel = ghostModel
+        if ghostModel is None:
+            self.ghostModel = expectimax.GHOST_MODELS['beeline']
+
+        self.random = random.Random(seed)
+        self.root = None
+        self.iterations = 0
+        self.reused = 0                             # simulations the root kept from last move
+
+        self._lowest = float('inf')
+        self._highest = float('-inf')
+
+    def search(self, gameState, deadline = None, maxIterations = None):
+        """
+        Simulate from `gameState` until `deadline` (a `time.perf_counter()` value)
+        or `maxIterations`, whichever comes first (at least one simulation always runs).
+        """
+
+        if self.root is None or self.root.position != gameState.getPacmanPosition():
+            self.root = TreeNode(gameState.getPacmanPosition())
+        self.reused = self.root.visits
+
+        state = searchState.SearchState(gameState)
+        self.iterations = 0
+        self._lowest = float('inf')
+        self._highest = float('-inf')
+        while True:
+            self.simulate(state)
+            self.iterations += 1
+
+            if maxIterations is not None and self.iterations >= maxIterations:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+            if deadline is None and maxIterations is None:
+                break
+
+    def bestMove(self):
+        """
+        The most visited move at the root (see `mostVisited`).
+        """
+
+        return mostVisited(self.rootStatistics())
+
+    def rootStatistics(self):
+        """
+        {move: (visits, total value)} of the root's children.
+        """
+
+        return {move: (child.visits, child.total) for (move, child) in self.root.children.items()}
+
+    def advance(self, move):
+        """
+        Keep the subtree under `move` (just played) for the next search.
+        """
+
+        self.root = self.root.children.get(move)
+
+    def simulate(self, state):
+        """
+        One simulation from `state` (a `pacai.student.searchState.SearchState`,
+        left as it was found).
+        """
+
+        node = self.root
+        path = [node]
+        numMoves = state.numMoves()
+
+        # Selection and expansion.
+        while not (state.isWin() or state.isLose()):
+            if node.untried is None:
+                node.untried = self.legalMoves(state)
+                self.random.shuffle(node.untried)
+
+            if len(node.untried) > 0:
+                move = node.untried.pop()
+                self.playPly(state, move)
+                child = TreeNode(state.getPacmanPosition())
+                node.children[move] = child
+                path.append(child)
+                break
+
+            move = self.select(node)
+            self.playPly(state, move)
+            node = node.children[move]
+            path.append(node)
+
+        value = self.rollout(state)
+        state.undoTo(numMoves)
+        self._lowest = min(self._lowest, value)
+        self._highest = max(self._highest, value)
+
+        for node in path:
+            node.visits += 1
+            node.total += value
+
+    def select(self, node):
+        """
+        The child move with the highest UCB1 score.
+        """
+
+        spread = self._highest - self._lowest
+        if spread <= 0:
+            spread = 1.0
+        logVisits = math.log(node.visits)
+
+        def score(move):
+            child = node.children[move]
+            exploit = (child.mean() - self._lowest) / spread
+            return exploit + self.exploration * math.sqrt(logVisits / child.visits)
+
+        return max(node.children, key = score)
+
+    def rollout(self, state):
+        for ply in range(self.rolloutDepth):
+            if state.isWin() or state.isLose():
+                break
+
+            self.playPly(state, self.rolloutMove(state))
+
+        return self.evaluate(state)
+
+    def rolloutMove(self, state):
+        legalMoves = self.legalMoves(state)
+
+        if self.rolloutPolicy == 'random':
+            reverse = Directions.REVERSE.get(state.getAgentState(0).getDirection())
+            if reverse in legalMoves and len(legalMoves) > 1:
+                legalMoves.remove(reverse)
+            return self.random.choice(legalMoves)
+
+        if self.random.random() < self.epsilon:
+            return self.random.choice(legalMoves)
+
+        return max(legalMoves, key = lambda move: self.moveValue(state, move))
+
+    def moveValue(self, state, move):
+        """
+        What `evaluate` thinks of Pacman making `move`.
+        """
+
+        state.push(0, move)
+        value = self.evaluate(state)
+        state.pop()
+
+        return value
+
+    def playPly(self, state, move):
+        """
+        Pacman makes `move`, and then every ghost moves, drawn from the ghost model
+        (all pushed onto `state`).
+        """
+
+        state.push(0, move)
+        for agentIndex in range(1, state.getNumAgents()):
+            if state.isWin() or state.isLose():
+                break
+
+            legalMoves = state.getLegalActions(agentIndex)
+            if Directions.STOP in legalMoves and len(legalMoves) > 1:
+                legalMoves.remove(Directions.STOP)
+
+            weights = self.ghostModel(state, agentIndex, legalMoves)
+            ghostMove = self.random.choices(legalMoves, weights)[0]
+            state.push(agentIndex, ghostMove)
+
+    def legalMoves(self, state):
+        legalMoves = state.getLegalActions(0)
+        if Directions.STOP in legalMoves and len(legalMoves) > 1:
+            legalMoves.remove(Directions.STOP)
+
+        return legalMoves
+
+def mostVisited(statistics):
+    """
+    The most visited move in {move: (visits, total value)} (the better one on ties).
+    """
+
+    return max(statistics,
+            key = lambda move: (statistics[move][0], statistics[move][1] / statistics[move][0]))
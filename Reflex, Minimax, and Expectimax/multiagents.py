@@ -1,8 +1,16 @@
 import random
+import time
 
 from pacai.agents.base import BaseAgent
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
 from pacai.core import distance
+from pacai.student import alphaBeta
+from pacai.student import evaluation
+from pacai.student import expectimax
+from pacai.student import mcts
+from pacai.student import parallelSearch
+from pacai.student import searchState
+from pacai.student import transposition
 
 class ReflexAgent(BaseAgent):
     """
@@ -71,7 +79,327 @@ class ReflexAgent(BaseAgent):
 
         return finalScore
 
-class MinimaxAgent(MultiAgentSearchAgent):
+DEFAULT_MAX_DEPTH = 64
+
+class GameTreeSearchAgent(MultiAgentSearchAgent):
+    """
+    Plumbing shared by the game tree agents below:
+    a transposition table, and iterative deepening under a time budget.
+
+    Every searched state is hashed (`pacai.student.transposition.ZobristHasher`, with the
+    agent to move), and its value is stored along with how many plies were left below it.
+    When the same state comes up again through a different order of moves
+    (which happens a lot with several ghosts), the stored value is used instead of searching
+    it again, as long as it was searched exactly as deep
+    (or with a `moveTime`, at least as deep, see below).
+    The table is kept between moves, since a stored value depends only on the state.
+
+    `tableSize` is the number of table slots (0 turns the table off).
+
+    Leaf values are cached by the same hashes for the whole game
+    (`pacai.student.transposition.EvaluationCache`, with up to `evaluationCacheSize` entries,
+    0 turns it off), since the searches of consecutive moves keep evaluating the same leaves.
+    Before every move, the leaves with more food than the game has left are dropped.
+
+    Without a `moveTime`, every move is searched to `getTreeDepth()`.
+    With one (in seconds), every move is searched to depth 1, 2, 3, ... (up to `maxDepth`)
+    until the time is up, and the move from the deepest search that finished is played.
+    The unfinished search is abandoned (by raising `pacai.student.alphaBeta.SearchTimeout`),
+    but the first one is always allowed to finish.
+    Each iteration leaves the best move of every searched state in the table,
+    so the next (deeper) one tries the previous principal variation first.
+    Only in this mode are results searched deeper than needed used as well
+    (the moves played depend on the time anyway).
+
+    With `workers` > 0, the search is split at the root across that many processes
+    (see `pacai.student.parallelSearch`): by default, every Pacman move is searched by a worker
+    (`GameTreeSearchAgent.splitMove` cuts it finer), and the root moves are sent out
+    best first (by the previous iteration's values).
+    Every worker has an agent of the same class and options, and its own table.
+
+    Below the root, searches run on a `pacai.student.searchState.SearchState`,
+    which makes and takes back moves in place instead of copying the state for every node
+    (`searchStates = 0` searches on the game's own states instead).
+    """
+
+    def __init__(self, index, tableSize = transposition.DEFAULT_TABLE_SIZE, moveTime = None,
+            maxDepth = DEFAULT_MAX_DEPTH, workers = 0, searchStates = 1,
+            evaluationCacheSize = transposition.DEFAULT_CACHE_SIZE, **kwargs):
+        super().__init__(index, **kwargs)
+
+        self.searchStates = bool(int(searchStates))
+
+        self.moveTime = None
+        if moveTime is not None:
+            self.moveTime = float(moveTime)
+
+        # Deeper results would make a fixed-depth move depend on what earlier moves stored.
+        self.hasher = transposition.ZobristHasher()
+        self.table = None
+        if int(tableSize) > 0:
+            self.table = transposition.TranspositionTable(int(tableSize),
+                    reuseDeeper = self.moveTime is not None)
+
+        self.evaluationCache = None                 # needs the table's hashes
+        if self.table is not None and int(evaluationCacheSize) > 0:
+            self.evaluationCache = transposition.EvaluationCache(int(evaluationCacheSize))
+
+        self.maxDepth = int(maxDepth)
+        self.completedDepth = 0                     # the depth of the last move's search
+        self.nodesSearched = 0                      # non-leaf nodes in the last move's search
+
+        self._searchDepth = None                    # the current iteration's depth
+        self._deadline = None
+
+        self.workers = int(workers)
+        self._workerOptions = dict(kwargs, tableSize = tableSize, moveTime = moveTime,
+                maxDepth = maxDepth, searchStates = searchStates,
+                evaluationCacheSize = evaluationCacheSize)
+        self._pool = None
+        self._rootValues = {}                       # root move : value in the last iteration
+
+    def searchDepth(self):
+        """
+        The depth of the search in progress.
+        """
+
+        if self._searchDepth is not None:
+            return self._searchDepth
+
+        return self.getTreeDepth()
+
+    def remainingDepth(self, currentDepth):
+        return self.searchDepth() - currentDepth
+
+    def enterNode(self):
+        """
+        Count a searched (non-leaf) node, and stop the search if the move time is up.
+        """
+
+        self.nodesSearched += 1
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise alphaBeta.SearchTimeout()
+
+    def search(self, gameState):
+        """
+        Pick a move with `value`, at a fixed depth or by iterative deepening (see above).
+        """
+
+        self.newSearch()
+        self.dropEvaluations(gameState.getNumFood())
+        if self.moveTime is None:
+            self.completedDepth = self.getTreeDepth()
+            return self.rootValue(gameState)
+
+        deadline = time.perf_counter() + self.moveTime
+        move = None
+        try:
+            for depth in range(1, self.maxDepth + 1):
+                self._searchDepth = depth
+                move = self.rootValue(gameState)
+                self.completedDepth = depth
+
+                self._deadline = deadline           # only the first iteration is exempt
+                if time.perf_counter() > deadline:
+                    break
+        except alphaBeta.SearchTimeout:
+            pass
+        finally:
+            self._searchDepth = None
+            self._deadline = None
+
+        return move
+
+    def rootValue(self, gameState):
+        if self.workers > 0:
+            return self.parallelValue(gameState)
+
+        return self.value(self.rootState(gameState, 0), 0)
+
+    def rootState(self, gameState, agentIndex):
+        """
+        The state to search from `gameState` on, with `agentIndex` to move:
+        a `pacai.student.searchState.SearchState` (hashed along the way if there is a table),
+        unless `searchStates` is off.
+        """
+
+        if not self.searchStates:
+            return gameState
+
+        hasher = None
+        if self.table is not None:
+            hasher = self.hasher
+
+        return searchState.SearchState(gameState, agentIndex, hasher)
+
+    def parallelValue(self, gameState):
+        """
+        Pick a move like `value`, with the search split across the worker processes.
+        """
+
+        deadline = None
+        if self._deadline is not None:
+            deadline = time.time() + (self._deadline - time.perf_counter())
+
+        legalMoves = gameState.getLegalActions()
+        if 'Stop' in legalMoves and len(legalMoves) > 1:
+            legalMoves.remove('Stop')
+        legalMoves.sort(key = lambda move: self._rootValues.get(move, float('-inf')),
+                reverse = True)
+
+        pieces = []
+        for move in legalMoves:
+            successor = gameState.generatePacmanSuccessor(move)
+            for (ghostMove, probability, state, agentIndex, currentDepth) in \
+                    self.splitMove(successor):
+                pieces.append(((move, probability), state, agentIndex, currentDepth,
+                        self.searchDepth(), ghostMove is None))
+
+        values = {move: 0.0 for move in legalMoves}
+        timedOut = False
+        for ((move, probability), v, nodes) in self.getPool(gameState).search(pieces, deadline):
+            self.nodesSearched += nodes
+            if v is None:
+                timedOut = True
+            else:
+                values[move] += probability * v
+
+        if timedOut:
+            raise alphaBeta.SearchTimeout()
+
+        self._rootValues = values
+        bestScore = max(self._rootValues.values())
+        return random.choice([move for move in legalMoves if self._rootValues[move] == bestScore])
+
+    def splitMove(self, successor):
+        """
+        The pieces a root move is searched in, given the state after it:
+        a list of (ghost move, probability, state, agent to move, currentDepth),
+        where the move is worth the probability-weighted sum of its pieces.
+        By default, the whole move is one piece (with no ghost move).
+        """
+
+        return [(None, 1.0, successor) + self.nextTurn(0, 0, successor.getNumAgents())]
+
+    def nextTurn(self, agentIndex, currentDepth, numAgents):
+        """
+        (agent to move, currentDepth) once `agentIndex` has moved.
+        """
+
+        nextAgent = (agentIndex + 1) % numAgents
+        if nextAgent == 0:
+            return (0, currentDepth + 1)
+
+        return (nextAgent, currentDepth)
+
+    def searchPiece(self, gameState, agentIndex, currentDepth, depth, alpha, deadline = None):
+        """
+        Search one piece of a parallel search (in a worker):
+        the value of `gameState` with `agentIndex` to move, `currentDepth` plies into a search
+        `depth` deep, with the best root value so far at `alpha`.
+        Returns None if `deadline` (a `time.perf_counter()` value) passes first.
+        """
+
+        self.newSearch()
+        self.dropEvaluations(gameState.getNumFood() + 1)    # the root is a Pacman move up
+        self._searchDepth = depth
+        self._deadline = deadline
+        try:
+            return self.nodeValue(self.rootState(gameState, agentIndex), agentIndex, currentDepth,
+                    alpha)
+        except alphaBeta.SearchTimeout:
+            return None
+        finally:
+            self._searchDepth = None
+            self._deadline = None
+
+    def getPool(self, gameState):
+        if self._pool is None or not self._pool.matches(gameState):
+            self.closePool()
+            self._pool = parallelSearch.RootSplitPool(self.workers, type(self),
+                    self._workerOptions, gameState)
+
+        return self._pool
+
+    def closePool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def final(self, state):
+        self.closePool()
+        super().final(state)
+
+    def probe(self, gameState, stateHash, agentIndex, depth,
+            alpha = float('-inf'), beta = float('inf')):
+        """
+        Look a state up in the table (hashing it first if `stateHash` is None).
+        Returns (stateHash, value, move): value is not None if the stored result can be used
+        as is, and move is the best move stored for the state (or None).
+        """
+
+        if self.table is None:
+            return (None, None, None)
+
+        if stateHash is None:
+            stateHash = self.hasher.hash(gameState, agentIndex)
+
+        (value, entry) = self.table.lookup(stateHash, depth, alpha, beta)
+        if entry is None:
+            return (stateHash, None, None)
+
+        return (stateHash, value, entry.move)
+
+    def store(self, stateHash, depth, value, move, alpha = float('-inf'), beta = float('inf')):
+        """
+        Store a searched value (the window tells whether it is exact or a bound).
+        """
+
+        if self.table is not None:
+            self.table.store(stateHash, depth, value,
+                    transposition.boundType(value, alpha, beta), move)
+
+    def leafValue(self, gameState, stateHash):
+        """
+        The evaluation function's value for a leaf (from the cache, if it is there).
+        """
+
+        if self.evaluationCache is None or stateHash is None:
+            return self.getEvaluationFunction()(gameState)
+
+        return self.evaluationCache.value(self.getEvaluationFunction(), gameState, stateHash)
+
+    def dropEvaluations(self, numFood):
+        """
+        Drop the cached leaves with more than `numFood` pellets: they cannot come up anymore.
+        """
+
+        if self.evaluationCache is not None:
+            self.evaluationCache.dropAbove(numFood)
+
+    def makeMove(self, gameState, agentIndex, action, stateHash):
+        """
+        (the state after `agentIndex` makes `action`, its hash), see
+        `pacai.student.searchState.makeMove` (and `undoMove`, to take it back).
+        """
+
+        hasher = None
+        if self.table is not None:
+            hasher = self.hasher
+
+        nextAgent = (agentIndex + 1) % gameState.getNumAgents()
+        return searchState.makeMove(gameState, agentIndex, action, nextAgent, stateHash, hasher)
+
+    def undoMove(self, gameState):
+        searchState.undoMove(gameState)
+
+    def newSearch(self):
+        self.nodesSearched = 0
+        self._rootValues = {}
+        if self.table is not None:
+            self.table.newSearch()
+
+class MinimaxAgent(GameTreeSearchAgent):
     """
     A minimax agent.
 
@@ -106,61 +434,90 @@ class MinimaxAgent(MultiAgentSearchAgent):
         (v, a) = self.maxValue(gameState, currentDepth)
         return a
 
-    def maxValue(self, gameState, currentDepth):
+    def nodeValue(self, gameState, agentIndex, currentDepth, alpha = None):
+        if agentIndex == 0:
+            return self.maxValue(gameState, currentDepth)[0]
+
+        return self.minValue(gameState, currentDepth, agentIndex)[0]
+
+    def maxValue(self, gameState, currentDepth, stateHash = None):
         # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.getEvaluationFunction()(gameState), None)
+        if currentDepth == self.searchDepth() or gameState.isWin() or gameState.isLose():
+            return (self.leafValue(gameState, stateHash), None)
         # node
         else:
+            self.enterNode()
+            # Already searched this state (through another order of moves)?
+            depth = self.remainingDepth(currentDepth)
+            (stateHash, v, a) = self.probe(gameState, stateHash, 0, depth)
+            if v is not None:
+                return (v, a)
             # Get legal moves for pacman
             legalMoves = gameState.getLegalActions()
             if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
                 legalMoves.remove('Stop')
-            # Get successor states from legal moves
-            successors = [gameState.generatePacmanSuccessor(action) for action in legalMoves]
-            # Send successors to minValue func
-            minPairs = [self.minValue(s, currentDepth) for s in successors]
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
+            # Send the successor of each legal move to minValue func
+            # (one at a time: a search state makes the move in place, and takes it back after)
+            scores = []
+            for action in legalMoves:
+                (successor, successorHash) = self.makeMove(gameState, 0, action, stateHash)
+                scores.append(self.minValue(successor, currentDepth,
+                        stateHash = successorHash)[0])
+                self.undoMove(gameState)
             # Get max of minValues
             bestScore = max(scores)
             bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
             chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
+            self.store(stateHash, depth, scores[chosenIndex], legalMoves[chosenIndex])
             return (scores[chosenIndex], legalMoves[chosenIndex])
 
-    def minValue(self, gameState, currentDepth, agentNum = 1):
+    def minValue(self, gameState, currentDepth, agentNum = 1, stateHash = None):
         # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.getEvaluationFunction()(gameState), None)
+        if currentDepth == self.searchDepth() or gameState.isWin() or gameState.isLose():
+            return (self.leafValue(gameState, stateHash), None)
         # node
         else:
+            self.enterNode()
+            # Already searched this state (through another order of moves)?
+            depth = self.remainingDepth(currentDepth)
+            (stateHash, v, a) = self.probe(gameState, stateHash, agentNum, depth)
+            if v is not None:
+                return (v, a)
             # Get legal moves of ghost agent
             legalMoves = gameState.getLegalActions(agentNum)
             if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
                 legalMoves.remove('Stop')
-            # Get successor states from legal moves
-            successors = [gameState.generateSuccessor(agentNum, action) for action in legalMoves]
-            # Send successors to minValue or maxValue func (multiple minValue layers, 1 per ghost)
-            minPairs = []
-            if agentNum == gameState.getNumAgents() - 1:    # all ghosts done
-                minPairs = [self.maxValue(s, currentDepth + 1) for s in successors]
-            else:                                           # more ghosts to be done
-                minPairs = [self.minValue(s, currentDepth, agentNum + 1) for s in successors]
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
+            # Send the successor of each legal move to minValue or maxValue func
+            # (multiple minValue layers, 1 per ghost)
+            scores = []
+            for action in legalMoves:
+                (successor, successorHash) = self.makeMove(gameState, agentNum, action, stateHash)
+                if agentNum == gameState.getNumAgents() - 1:    # all ghosts done
+                    scores.append(self.maxValue(successor, currentDepth + 1,
+                            stateHash = successorHash)[0])
+                else:                                           # more ghosts to be done
+                    scores.append(self.minValue(successor, currentDepth, agentNum + 1,
+                            stateHash = successorHash)[0])
+                self.undoMove(gameState)
             # Get min of maxValues (or previous layers of minValue)
             bestScore = min(scores)
             bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
             chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
+            self.store(stateHash, depth, scores[chosenIndex], legalMoves[chosenIndex])
             return (scores[chosenIndex], legalMoves[chosenIndex])
 
     def getAction(self, gameState):
-        a = self.value(gameState, 0)
+        a = self.search(gameState)
 
         return a
 
-class AlphaBetaAgent(MultiAgentSearchAgent):
+class AlphaBetaAgent(GameTreeSearchAgent):
     """
     A minimax agent with alpha-beta pruning.
 
+    The search itself is `pacai.student.alphaBeta.AlphaBetaSearch`
+    (shared with the capture agents), with Pacman maximizing and every ghost minimizing.
+
     Method to Implement:
 
     `pacai.agents.base.BaseAgent.getAction`:
@@ -172,86 +529,52 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index, **kwargs)
 
+        self.engine = alphaBeta.AlphaBetaSearch(self.getEvaluationFunction(), self.getTreeDepth(),
+                self.table, self.hasher, self.enterNode, self.evaluationCache)
+
+    def newSearch(self):
+        super().newSearch()
+        self.engine.newSearch()
+
     # see page 311 of textbook for psudocode for alphaBeta()
     def value(self, gameState, currentDepth):
         (v, a) = self.maxValue(gameState, currentDepth)
         return a
 
-    def maxValue(self, gameState, currentDepth, alpha = -999999, beta = 999999):
-        # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.getEvaluationFunction()(gameState), None)
-        # node
-        else:
-            # Get legal moves for pacman
-            legalMoves = gameState.getLegalActions()
-            if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
-                legalMoves.remove('Stop')
-            # Get successor states from legal moves
-            successors = [gameState.generatePacmanSuccessor(action) for action in legalMoves]
-            # Send successors to minValue func
-            minPairs = []
-            for s in successors:
-                (v2, a2) = self.minValue(s, currentDepth, alpha=alpha, beta=beta)
-                minPairs.append((v2, a2))
-                alpha = max(alpha, v2)
-                if v2 >= beta:
-                    index = successors.index(s)
-                    return (v2, legalMoves[index])
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
-            # Get max of minValues
-            bestScore = max(scores)
-            bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
-            chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
-            return (scores[chosenIndex], legalMoves[chosenIndex])
+    def nodeValue(self, gameState, agentIndex, currentDepth, alpha = float('-inf')):
+        if agentIndex == 0:
+            return self.maxValue(gameState, currentDepth, alpha, float('inf'))[0]
 
-    def minValue(self, gameState, currentDepth, agentNum = 1, alpha = -999999, beta = 999999):
-        # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.getEvaluationFunction()(gameState), None)
-        # node
-        else:
-            # Get legal moves of ghost agent
-            legalMoves = gameState.getLegalActions(agentNum)
-            if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
-                legalMoves.remove('Stop')
-            # Get successor states from legal moves
-            successors = [gameState.generateSuccessor(agentNum, action) for action in legalMoves]
-            # Send successors to minValue or maxValue func (multiple minValue layers, 1 per ghost)
-            minPairs = []
-            if agentNum == gameState.getNumAgents() - 1:    # all ghosts done
-                for s in successors:
-                    (v2, a2) = self.maxValue(s, currentDepth + 1, alpha=alpha, beta=beta)
-                    minPairs.append((v2, a2))
-                    beta = min(beta, v2)
-                    if v2 >= alpha:
-                        index = successors.index(s)
-                        return (v2, legalMoves[index])
-            else:                                           # more ghosts to be done
-                for s in successors:
-                    (v2, a2) = self.minValue(s, currentDepth, agentNum + 1, alpha=alpha, beta=beta)
-                    minPairs.append((v2, a2))
-                    beta = min(beta, v2)
-                    if v2 >= alpha:
-                        index = successors.index(s)
-                        return (v2, legalMoves[index])
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
-            # Get min of maxValues (or previous layers of minValue)
-            bestScore = min(scores)
-            bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
-            chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
-            return (scores[chosenIndex], legalMoves[chosenIndex])
+        return self.minValue(gameState, currentDepth, agentIndex, alpha, float('inf'))[0]
+
+    def prepareEngine(self, gameState):
+        self.engine.depth = self.searchDepth()
+        self.engine.setTurnOrder(0, range(1, gameState.getNumAgents()))
+
+    def maxValue(self, gameState, currentDepth, alpha = -999999, beta = 999999, stateHash = None):
+        self.prepareEngine(gameState)
+        return self.engine.maxValue(gameState, currentDepth, alpha, beta, stateHash)
+
+    def minValue(self, gameState, currentDepth, agentNum = 1, alpha = -999999, beta = 999999,
+            stateHash = None):
+        self.prepareEngine(gameState)
+        return self.engine.minValue(gameState, currentDepth, agentNum, alpha, beta, stateHash)
 
     def getAction(self, gameState):
-        a = self.value(gameState, 0)
+        a = self.search(gameState)
 
         return a
 
-class ExpectimaxAgent(MultiAgentSearchAgent):
+class ExpectimaxAgent(GameTreeSearchAgent):
     """
     An expectimax agent.
 
-    All ghosts should be modeled as choosing uniformly at random from their legal moves.
+    All ghosts should be modeled as choosing uniformly at random from their legal moves
+    (or, with `ghostModel = 'beeline'`, like the contest's ghosts, see `ContestAgent`).
+
+    The search itself is `pacai.student.expectimax.ExpectimaxSearch`.
+    If the evaluation function has known bounds (see `EVALUATION_BOUNDS`),
+    chance nodes are cut off as soon as they cannot change Pacman's choice.
 
     Method to Implement:
 
@@ -261,64 +584,57 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
     and `pacai.agents.search.multiagent.MultiAgentSearchAgent.getEvaluationFunction`.
     """
 
-    def __init__(self, index, **kwargs):
+    def __init__(self, index, ghostModel = 'uniform', **kwargs):
         super().__init__(index, **kwargs)
+        self._workerOptions['ghostModel'] = ghostModel
+
+        evaluationFunction = self.getEvaluationFunction()
+        bounds = EVALUATION_BOUNDS.get('%s.%s' % (getattr(evaluationFunction, '__module__', ''),
+                getattr(evaluationFunction, '__name__', '')))
+
+        self.engine = expectimax.ExpectimaxSearch(evaluationFunction, self.getTreeDepth(),
+                bounds, expectimax.GHOST_MODELS[ghostModel], self.table, self.hasher,
+                self.enterNode, self.evaluationCache)
+
+    def newSearch(self):
+        super().newSearch()
+        self.engine.newSearch()
 
     # see page 305 of textbook for psudocode for minmax()
     def value(self, gameState, currentDepth):
         (v, a) = self.maxValue(gameState, currentDepth)
         return a
 
-    def maxValue(self, gameState, currentDepth):
-        # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.getEvaluationFunction()(gameState), None)
-        # node
-        else:
-            # Get legal moves for pacman
-            legalMoves = gameState.getLegalActions()
-            if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
-                legalMoves.remove('Stop')
-            # Get successor states from legal moves
-            successors = [gameState.generatePacmanSuccessor(action) for action in legalMoves]
-            # Send successors to expValue func
-            minPairs = [self.expValue(s, currentDepth) for s in successors]
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
-            # Get max of expValues
-            bestScore = max(scores)
-            bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
-            chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
-            return (scores[chosenIndex], legalMoves[chosenIndex])
+    def nodeValue(self, gameState, agentIndex, currentDepth, alpha = float('-inf')):
+        if agentIndex == 0:
+            return self.maxValue(gameState, currentDepth, alpha)[0]
 
-    def expValue(self, gameState, currentDepth, agentNum = 1):
-        # terminal (including win/lose states)
-        if currentDepth == self.getTreeDepth() or gameState.isWin() or gameState.isLose():
-            return (self.getEvaluationFunction()(gameState), None)
-        # node
-        else:
-            # Get legal moves of ghost agent
-            legalMoves = gameState.getLegalActions(agentNum)
-            if 'Stop' in legalMoves:    # remove 'Stop' move so that pacman always moving somwhere
-                legalMoves.remove('Stop')
-            # Get successor states from legal moves
-            successors = [gameState.generateSuccessor(agentNum, action) for action in legalMoves]
-            # Send successors to expValue or maxValue func (multiple minValue layers, 1 per ghost)
-            minPairs = []
-            if agentNum == gameState.getNumAgents() - 1:    # all ghosts done
-                minPairs = [self.maxValue(s, currentDepth + 1) for s in successors]
-            else:                                           # more ghosts to be done
-                minPairs = [self.expValue(s, currentDepth, agentNum + 1) for s in successors]
-            scores = list(list(zip(*minPairs))[0])    # convert pairs to usable score list
-            # Get expectedUtility of maxValues (or previous layers of expValue)
-            expectedUtility = sum(scores) / len(scores)
-            # Current choice of move action according to minimax (not important)
-            bestScore = min(scores)
-            bestIndices = [index for index in range(len(scores)) if scores[index] == bestScore]
-            chosenIndex = random.choice(bestIndices)  # Pick randomly among the best.
-            return (expectedUtility, legalMoves[chosenIndex])
+        return self.expValue(gameState, currentDepth, agentIndex, alpha)[0]
+
+    def splitMove(self, successor):
+        """
+        Split a root move further, into one piece per move of the first ghost.
+        """
+
+        if successor.isWin() or successor.isLose() or successor.getNumAgents() == 1:
+            return super().splitMove(successor)
+
+        return [(move, probability, successor.generateSuccessor(1, move))
+                + self.nextTurn(1, 0, successor.getNumAgents())
+                for (move, probability) in self.engine.chanceMoves(successor, 1)]
+
+    def maxValue(self, gameState, currentDepth, alpha = float('-inf'), beta = float('inf'),
+            stateHash = None):
+        self.engine.depth = self.searchDepth()
+        return self.engine.maxValue(gameState, currentDepth, alpha, beta, stateHash)
+
+    def expValue(self, gameState, currentDepth, agentNum = 1, alpha = float('-inf'),
+            beta = float('inf'), stateHash = None):
+        self.engine.depth = self.searchDepth()
+        return self.engine.expValue(gameState, currentDepth, agentNum, alpha, beta, stateHash)
 
     def getAction(self, gameState):
-        a = self.value(gameState, 0)
+        a = self.search(gameState)
 
         return a
 
@@ -334,38 +650,140 @@ def betterEvaluationFunction(currentGameState):
         food pellets:                       100
         distance to farthest food pellet:   100
         distance to closest ghost:          150
+
+    Distances come from `pacai.student.evaluation`, which only goes over the pellets once per
+    food grid (`betterMazeEvaluationFunction` uses maze distances instead).
+    """
+
+    return _betterEvaluation(currentGameState, MANHATTAN_EVALUATOR)
+
+def betterMazeEvaluationFunction(currentGameState):
     """
+    `betterEvaluationFunction`, with maze distances instead of Manhattan distances.
+    """
+
+    return _betterEvaluation(currentGameState, MAZE_EVALUATOR)
+
+MANHATTAN_EVALUATOR = evaluation.Evaluator()
+MAZE_EVALUATOR = evaluation.Evaluator(useMazeDistances = True)
+
+def _betterEvaluation(currentGameState, evaluator):
     # game state information
-    food = currentGameState.getFood().asList()
-    pacmanPos = currentGameState.getPacmanPosition()
-    ghostsPos = currentGameState.getGhostPositions()
+    food = evaluator.foodSummary(currentGameState)
 
     # track the number of food pellets left on the board
     numFood = 0
-    if len(food) > 0:   # edge case for 0 pellets
-        numFood = 100 * (1 / len(food))
+    if food.count > 0:  # edge case for 0 pellets
+        numFood = 100 * (1 / food.count)
 
     # track the distance to the farthest food pellet on the board
-    pacmanToFoodDistances = []
-    for f in food:
-        d = distance.manhattan(pacmanPos, f)
-        pacmanToFoodDistances.append(d)
     foodDist = 0
-    if len(pacmanToFoodDistances) > 0:  # edge case for 0 pellets
-        foodDist = 100 * (1 / max(pacmanToFoodDistances))
+    if food.count > 0:  # edge case for 0 pellets
+        foodDist = 100 * (1 / evaluator.farthestFood(currentGameState, food))
 
     # track the disance from pacman to the closes ghost
-    pacmanToGhostDistances = []
-    for g in ghostsPos:
-        d = distance.manhattan(pacmanPos, g)
-        if d != 0:      # edge case where distance = 0; leads to div by 0 error
-            pacmanToGhostDistances.append(d)
+    # (skipping distance = 0; leads to div by 0 error)
+    pacmanToGhostDistances = [d for d in evaluator.ghostDistances(currentGameState) if d != 0]
     ghostDist = 0
-    if len(pacmanToGhostDistances) > 0:  # edge case for 0 pellets
+    if len(pacmanToGhostDistances) > 0:  # edge case for 0 ghosts
         ghostDist = 150 * (1 / min(pacmanToGhostDistances))
 
     return currentGameState.getScore() + numFood + foodDist + ghostDist
 
+# How pacai scores a game (see `pacai.bin.pacman`).
+TIME_PENALTY = searchState.TIME_PENALTY
+FOOD_POINTS = searchState.FOOD_POINTS
+BOARD_CLEAR_POINTS = searchState.BOARD_CLEAR_POINTS
+GHOST_POINTS = searchState.GHOST_POINTS
+LOSE_POINTS = searchState.LOSE_POINTS
+COLLISION_TOLERANCE = searchState.COLLISION_TOLERANCE
+
+def scoreBounds(gameState, plies):
+    """
+    Bounds (low, high) on the score of any state reachable from `gameState` within `plies`
+    plies (a move of every agent), following the scoring rules:
+    Pacman loses a point a move, gets points for every pellet he eats (and more for the last),
+    and for every scared ghost he catches, and loses points if a ghost catches him.
+    A win, a loss, or a caught ghost only counts if it can happen that soon.
+    """
+
+    return _scoreBounds(gameState, plies, gameState.getNumFood())
+
+def _scoreBounds(gameState, plies, numFood):
+    score = gameState.getScore()
+    pacmanPosition = gameState.getPacmanPosition()
+
+    # Pacman and the ghosts close in on each other by at most one step each a ply.
+    reach = 2 * plies + COLLISION_TOLERANCE
+    nearGhosts = [ghost for ghost in gameState.getGhostStates()
+            if distance.manhattan(pacmanPosition, ghost.getPosition()) <= reach]
+    numCapsules = len([capsule for capsule in gameState.getCapsules()
+            if distance.manhattan(pacmanPosition, capsule) <= plies])
+
+    low = score - TIME_PENALTY * plies
+    if len(nearGhosts) > 0:
+        low -= LOSE_POINTS
+
+    # Each ghost can be caught once if scared now, and once more for every capsule in reach.
+    catches = sum([numCapsules + (1 if ghost.isScared() else 0) for ghost in nearGhosts])
+    high = score + FOOD_POINTS * min(plies, numFood) + GHOST_POINTS * catches
+    if numFood <= plies:
+        high += BOARD_CLEAR_POINTS
+
+    return (low, high)
+
+def betterEvaluationBounds(gameState, plies):
+    """
+    Bounds (low, high) on `betterEvaluationFunction` for any state reachable from `gameState`
+    within `plies` plies: `scoreBounds`, plus bounds on each of its terms.
+    """
+
+    food = MANHATTAN_EVALUATOR.foodSummary(gameState)
+    pacmanPosition = gameState.getPacmanPosition()
+    (low, high) = _scoreBounds(gameState, plies, food.count)
+
+    # Pellets only go away, one a move at most.
+    if food.count > plies:
+        low += 100 * (1 / food.count)
+        high += 100 * (1 / (food.count - plies))
+    else:
+        high += 100
+
+    # The farthest pellet is still there (and at most `plies` steps closer),
+    # unless Pacman gets to it.
+    farthestFood = 0
+    if food.count > 0:
+        farthestFood = food.farthestManhattan(pacmanPosition)
+    if farthestFood > plies:
+        high += 100 * (1 / (farthestFood - plies))
+    else:
+        high += 100
+
+    # Ghosts close in by at most two steps a ply (but a caught ghost starts over anywhere),
+    # and scared ones can stand half a step away.
+    ghostDistances = [distance.manhattan(pacmanPosition, g) for g in gameState.getGhostPositions()]
+    canCatch = (any([ghost.isScared() for ghost in gameState.getGhostStates()])
+            or any([distance.manhattan(pacmanPosition, capsule) <= plies
+                for capsule in gameState.getCapsules()]))
+    if len(ghostDistances) > 0:
+        if canCatch or min(ghostDistances) - 2 * plies < 0.5:
+            high += 150 * (1 / 0.5)
+        else:
+            high += 150 * (1 / (min(ghostDistances) - 2 * plies))
+
+    return (low, high)
+
+# Bounds for evaluation functions (by qualified name), used to prune `ExpectimaxAgent`'s search.
+# Maze distances are never shorter than Manhattan distances, so the maze version's terms are
+# never larger, and its bounds are the same.
+EVALUATION_BOUNDS = {
+    'pacai.core.eval.score': scoreBounds,
+    'pacai.student.multiagents.betterEvaluationFunction': betterEvaluationBounds,
+    'pacai.student.multiagents.betterMazeEvaluationFunction': betterEvaluationBounds,
+}
+
+DEFAULT_CONTEST_MOVE_TIME = 0.2
+
 class ContestAgent(MultiAgentSearchAgent):
     """
     Your agent for the mini-contest.
@@ -376,10 +794,97 @@ class ContestAgent(MultiAgentSearchAgent):
     Ghosts don't behave randomly anymore, but they aren't perfect either -- they'll usually
     just make a beeline straight towards Pacman (or away if they're scared!)
 
+    This agent uses Monte Carlo tree search (`pacai.student.mcts.MonteCarloTreeSearch`),
+    with ghosts modeled as beeline ghosts (`ghostModel`):
+    every move, it runs simulations for `moveTime` seconds (or `iterations` simulations,
+    if given) and plays the move simulated most.
+    The subtree under the move played is kept for the next move.
+    With `workers` > 0, that many processes also search trees of their own from the same state
+    (root parallelism), and their root statistics are added to this agent's.
+
     Method to Implement:
 
     `pacai.agents.base.BaseAgent.getAction`
     """
 
-    def __init__(self, index, **kwargs):
-        super().__init__(index, **kwargs)
+    def __init__(self, index, evalFn = 'pacai.student.multiagents.betterEvaluationFunction',
+            moveTime = DEFAULT_CONTEST_MOVE_TIME, iterations = None,
+            exploration = mcts.DEFAULT_EXPLORATION, rolloutDepth = mcts.DEFAULT_ROLLOUT_DEPTH,
+            rolloutPolicy = 'greedy', ghostModel = 'beeline', workers = 0, **kwargs):
+        super().__init__(index, evalFn = evalFn, **kwargs)
+
+        self.moveTime = None
+        if moveTime is not None:
+            self.moveTime = float(moveTime)
+
+        self.iterations = None
+        if iterations is not None:
+            self.iterations = int(iterations)
+
+        self.engine = mcts.MonteCarloTreeSearch(self.getEvaluationFunction(), float(exploration),
+                int(rolloutDepth), rolloutPolicy, ghostModel = expectimax.GHOST_MODELS[ghostModel])
+
+        self.workers = int(workers)
+        self._workerOptions = dict(kwargs, evalFn = evalFn, exploration = exploration,
+                rolloutDepth = rolloutDepth, rolloutPolicy = rolloutPolicy,
+                ghostModel = ghostModel)
+        self._pool = None
+
+    def getAction(self, gameState):
+        deadline = None
+        workerDeadline = None
+        if self.moveTime is not None:
+            deadline = time.perf_counter() + self.moveTime
+            workerDeadline = time.time() + self.moveTime
+
+        results = None
+        if self.workers > 0:
+            argsList = [(workerDeadline, self.iterations, random.getrandbits(32))
+                    for i in range(self.workers)]
+            results = self.getPool(gameState).callAsync('searchRoot', gameState, argsList)
+
+        self.engine.search(gameState, deadline, self.iterations)
+        statistics = self.engine.rootStatistics()
+
+        if results is not None:
+            for workerStatistics in results.get():
+                for (move, (visits, total)) in workerStatistics.items():
+                    (oldVisits, oldTotal) = statistics.get(move, (0, 0.0))
+                    statistics[move] = (oldVisits + visits, oldTotal + total)
+
+        move = mcts.mostVisited(statistics)
+        self.engine.advance(move)
+        return move
+
+    def searchRoot(self, gameState, deadline, iterations, seed):
+        """
+        Search a new tree from `gameState` (in a worker) until `deadline` (a `time.time()`
+        value), and return its root statistics (see `pacai.student.mcts`).
+        """
+
+        localDeadline = None
+        if deadline is not None:
+            localDeadline = time.perf_counter() + (deadline - time.time())
+
+        self.engine.random.seed(seed)
+        self.engine.root = None
+        self.engine.search(gameState, localDeadline, iterations)
+
+        return self.engine.rootStatistics()
+
+    def getPool(self, gameState):
+        if self._pool is None or not self._pool.matches(gameState):
+            self.closePool()
+            self._pool = parallelSearch.RootSplitPool(self.workers, type(self),
+                    self._workerOptions, gameState)
+
+        return self._pool
+
+    def closePool(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+
+    def final(self, state):
+        self.closePool()
+        super().final(state)
@@ -0,0 +1,161 @@
+"""
+Root-split parallel search for the game tree agents in `pacai.student.multiagents`.
+
+A search is cut into pieces at the root (one per Pacman move, or for expectimax,
+one per Pacman move and first ghost move), which are handed out to a pool of worker processes.
+Every worker runs its own copy of the agent, with its own transposition table
+(which stays warm from one move to the next).
+Workers read a shared alpha bound before every piece worth a whole root move,
+and raise it when one is done, so the searches of later root moves start from the best root value
+found so far (other pieces are only part of a root move's value, and get no alpha).
+
+States are sent pickled, but without their layout and walls:
+those never change during a game, so every worker gets them once when the pool starts,
+and each piece only carries what changes from state to state.
+"""
+
+import io
+import multiprocessing
+import pickle
+import time
+
+from pacai.util import reflection
+
+# The worker process's agent, static objects, and shared alpha (see `_initWorker`).
+_worker = {}
+
+class RootSplitPool(object):
+    """
+    `workers` processes, each with an `agentClass` agent built from `options`,
+    for the layout of `gameState`.
+    `bytesSent` counts the size of every state sent to the workers.
+    """
+
+    def __init__(self, workers, agentClass, options, gameState):
+        self.static = staticObjects(gameState)
+        self.bytesSent = 0
+
+        context = multiprocessing.get_context()
+        self.alpha = context.Value('d', float('-inf'))
+
+        className = agentClass.__module__ + '.' + agentClass.__qualname__
+        self._pool = context.Pool(workers, _initWorker,
+                (className, options, self.static, self.alpha))
+
+    def matches(self, gameState):
+        """
+        Whether this pool can search states of `gameState`'s game.
+        """
+
+        return gameState.getInitialLayout() is self.static['layout']
+
+    def search(self, pieces, deadline = None):
+        """
+        Search every piece, a (key, state, agentIndex, currentDepth, depth, raisesAlpha) tuple
+        (see `pacai.student.multiagents.GameTreeSearchAgent.searchPiece`), in order.
+        Returns a list of (key, value, nodes searched), in the order the pieces finished;
+        value is None if the piece was cut short by `deadline` (a `time.time()` value).
+        """
+
+        self.alpha.value = float('-inf')
+
+        tasks = []
+        for (key, state, agentIndex, currentDepth, depth, raisesAlpha) in pieces:
+            data = packState(state, self.static)
+            self.bytesSent += len(data)
+            tasks.append((key, data, agentIndex, currentDepth, depth, raisesAlpha, deadline))
+
+        # One piece at a time, so every worker sees the latest alpha before its next piece.
+        return list(self._pool.imap_unordered(_searchPiece, tasks, chunksize = 1))
+
+    def callAsync(self, method, gameState, argsList):
+        """
+        Call `method` of the workers' agents with `gameState` once for every tuple of
+        (further) arguments in `argsList`, without waiting.
+        Returns a `multiprocessing.pool.AsyncResult` for the list of results.
+        """
+
+        data = packState(gameState, self.static)
+        self.bytesSent += len(data)
+        tasks = [(method, data, args) for args in argsList]
+
+        return self._pool.map_async(_callAgent, tasks, chunksize = 1)
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+def staticObjects(gameState):
+    """
+    The parts of `gameState` that are the same objects in every state of its game.
+    """
+
+    return {
+        'layout': gameState.getInitialLayout(),
+        'walls': gameState.getWalls(),
+    }
+
+class _StatePickler(pickle.Pickler):
+    """
+    Pickles a state with its static objects replaced by their names.
+    """
+
+    def __init__(self, file, static):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._names = {id(obj): name for (name, obj) in static.items() if obj is not None}
+
+    def persistent_id(self, obj):
+        return self._names.get(id(obj))
+
+class _StateUnpickler(pickle.Unpickler):
+    def __init__(self, file, static):
+        super().__init__(file)
+        self._static = static
+
+    def persistent_load(self, name):
+        return self._static[name]
+
+def packState(gameState, static):
+    buffer = io.BytesIO()
+    _StatePickler(buffer, static).dump(gameState)
+    return buffer.getvalue()
+
+def unpackState(data, static):
+    return _StateUnpickler(io.BytesIO(data), static).load()
+
+def _initWorker(className, options, static, alpha):
+    agentClass = reflection.qualifiedImport(className)
+
+    _worker['agent'] = agentClass(0, **options)
+    _worker['static'] = static
+    _worker['alpha'] = alpha
+
+def _searchPiece(task):
+    (key, data, agentIndex, currentDepth, depth, raisesAlpha, deadline) = task
+    agent = _worker['agent']
+    alpha = _worker['alpha']
+
+    localDeadline = None
+    if deadline is not None:
+        localDeadline = time.perf_counter() + (deadline - time.time())
+
+    pieceAlpha = float('-inf')
+    if raisesAlpha:
+        pieceAlpha = alpha.value
+
+    gameState = unpackState(data, _worker['static'])
+    value = agent.searchPiece(gameState, agentIndex, currentDepth, depth, pieceAlpha,
+            localDeadline)
+
+    if value is not None and raisesAlpha:
+        with alpha.get_lock():
+            if value > alpha.value:
+                alpha.value = value
+
+    return (key, value, agent.nodesSearched)
+
+def _callAgent(task):
+    (method, data, args) = task
+    gameState = unpackState(data, _worker['static'])
+
+    return getattr(_worker['agent'], method)(gameState, *args)
@@ -0,0 +1,517 @@
+"""
+A mutable game state for the game tree searches in `pacai.student.multiagents`.
+
+`pacai.bin.pacman.PacmanGameState.generateSuccessor` copies the state (and every agent state
+in it) for every move, so a search allocates a whole state per node it visits.
+A `SearchState` starts from the real state at the root of a search, and then plays moves
+in place with `SearchState.push`, following the same rules as `pacai.bin.pacman`,
+and takes them back with `SearchState.pop`: a move only saves what it changes
+(the score, the food, and the agents that moved), so a search walks its whole tree
+on one object.
+
+The searches themselves go through `makeMove` and `undoMove`,
+which work on real states too (by generating successors), so the same search code runs on both.
+"""
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+# The rules of `pacai.bin.pacman`.
+TIME_PENALTY = 1
+FOOD_POINTS = 10
+BOARD_CLEAR_POINTS = 500
+GHOST_POINTS = 200
+LOSE_POINTS = 500
+COLLISION_TOLERANCE = 0.7
+SCARED_TIME = 40
+SCARED_SPEED = 0.5
+
+CARDINAL_DIRECTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+
+# Food grids kept by a state before they are dropped (see `SearchState.getFood`).
+MAX_FOOD_GRIDS = 4096
+
+class SearchState(object):
+    """
+    A state of a Pacman game that moves are made on (`push`) and taken back from (`pop`),
+    starting from `gameState` with `agentIndex` to move.
+    With a `hasher` (`pacai.student.transposition.ZobristHasher`), `hash` is kept up to date
+    with every move, and is what `hasher.hash` would give for the same state
+    and the agent to move next.
+
+    It has the same getters as a `pacai.bin.pacman.PacmanGameState`,
+    so evaluation functions, bounds, and ghost models can be used on it as is,
+    but what they return is only good until the next move:
+    agent states are views of the state as it is now, not copies.
+    Food grids are the exception: they never change once returned,
+    and the same food always gives the same grid (see `SearchState.getFood`).
+    """
+
+    def __init__(self, gameState, agentIndex = 0, hasher = None):
+        self._layout = gameState.getInitialLayout()
+        self._walls = gameState.getWalls()
+        self._exits = exitTable(self._walls)
+        self._hasher = hasher
+
+        numAgents = gameState.getNumAgents()
+        agentStates = [gameState.getAgentState(index) for index in range(numAgents)]
+        self._positions = [agentState.getPosition() for agentState in agentStates]
+        self._directions = [agentState.getDirection() for agentState in agentStates]
+        self._scaredTimers = [agentState.getScaredTimer() for agentState in agentStates]
+        self._views = [AgentView(self, index) for index in range(numAgents)]
+
+        # Where and how each ghost comes back once eaten.
+        self._spawns = [None]
+        for agentState in agentStates[1:]:
+            spawn = agentState.copy()
+            spawn.respawn()
+            self._spawns.append((spawn.getPosition(), spawn.getDirection()))
+
+        # Pellets as the bits of an int: (x, y) is bit x * height + y.
+        food = gameState.getFood()
+        self._height = food.getHeight()
+        self._width = food.getWidth()
+        self._foodBits = 0
+        for (x, y) in food.asList():
+            self._foodBits |= 1 << (x * self._height + y)
+        self._numFood = gameState.getNumFood()
+        self._food = food                           # the grid for the current food, if made yet
+        self._foodGrids = {self._foodBits: food}    # food bits : grid
+
+        self._capsules = list(gameState.getCapsules())
+        self._score = gameState.getScore()
+        self._win = gameState.isWin()
+        self._lose = gameState.isLose()
+
+        self.hash = None
+        if hasher is not None:
+            self.hash = hasher.hash(gameState, agentIndex)
+
+        self._undo = []                             # what every pushed move changed
+        self._journal = []                          # (index, position, direction, scared timer)
+
+    def push(self, agentIndex, action):
+        """
+        Make a move, like `pacai.bin.pacman.PacmanGameState.generateSuccessor`, but in place.
+        The agent after `agentIndex` is to move next.
+        """
+
+        if self._win or self._lose:
+            raise RuntimeError("Can't generate successors of a terminal state.")
+
+        self._undo.append((len(self._journal), self._score, self._win, self._lose,
+                self._foodBits, self._numFood, self._food, self._capsules, self.hash))
+
+        if agentIndex == 0:
+            self._movePacman(action)
+        else:
+            self._moveGhost(agentIndex, action)
+
+        if self._hasher is not None:
+            key = self._hasher.key
+            nextAgent = (agentIndex + 1) % len(self._positions)
+            self.hash ^= key(('toMove', agentIndex)) ^ key(('toMove', nextAgent))
+
+            oldScore = self._undo[-1][1]
+            if self._score != oldScore:
+                self.hash ^= key(('score', oldScore)) ^ key(('score', self._score))
+
+    def pop(self):
+        """
+        Take back the last move.
+        """
+
+        (journalLength, self._score, self._win, self._lose, self._foodBits, self._numFood,
+                self._food, self._capsules, self.hash) = self._undo.pop()
+
+        journal = self._journal
+        while len(journal) > journalLength:
+            (index, position, direction, scaredTimer) = journal.pop()
+            self._positions[index] = position
+            self._directions[index] = direction
+            self._scaredTimers[index] = scaredTimer
+
+    def numMoves(self):
+        """
+        How many moves have been pushed (and not popped yet).
+        """
+
+        return len(self._undo)
+
+    def undoTo(self, numMoves):
+        """
+        Pop moves until only `numMoves` are left.
+        """
+
+        while len(self._undo) > numMoves:
+            self.pop()
+
+    def _setAgent(self, index, position, direction, scaredTimer):
+        self._journal.append((index, self._positions[index], self._directions[index],
+                self._scaredTimers[index]))
+
+        if self._hasher is not None:
+            self.hash ^= self._hasher.agentKey(index, self._positions[index],
+                    self._directions[index], self._scaredTimers[index])
+            self.hash ^= self._hasher.agentKey(index, position, direction, scaredTimer)
+
+        self._positions[index] = position
+        self._directions[index] = direction
+        self._scaredTimers[index] = scaredTimer
+
+    def _movePacman(self, action):
+        if action not in self.getLegalActions(0):
+            raise ValueError('Illegal pacman action: ' + str(action))
+
+        (x, y) = self._positions[0]
+        (dx, dy) = Actions.directionToVector(action)
+        position = (int(x + dx), int(y + dy))
+
+        direction = action
+        if action == Directions.STOP:
+            direction = self._directions[0]
+        self._setAgent(0, position, direction, self._scaredTimers[0])
+
+        bit = 1 << (position[0] * self._height + position[1])
+        if self._foodBits & bit:
+            self._foodBits ^= bit
+            self._numFood -= 1
+            self._food = None
+            self._score += FOOD_POINTS
+            if self._hasher is not None:
+                self.hash ^= self._hasher.key(('food', position))
+
+            if self._numFood == 0 and not self._lose:
+                self._score += BOARD_CLEAR_POINTS
+                self._win = True
+
+        if position in self._capsules:
+            self._capsules = [capsule for capsule in self._capsules if capsule != position]
+            if self._hasher is not None:
+                self.hash ^= self._hasher.key(('capsule', position))
+
+            for index in range(1, len(self._positions)):
+                self._setAgent(index, self._positions[index], self._directions[index],
+                        SCARED_TIME)
+
+        self._score -= TIME_PENALTY
+
+        # Pacman may have run into any ghost.
+        for index in range(1, len(self._positions)):
+            self._checkCollision(index)
+
+    def _moveGhost(self, index, action):
+        if action not in self.getLegalActions(index):
+            raise ValueError('Illegal ghost action: ' + str(action))
+
+        scaredTimer = self._scaredTimers[index]
+        speed = 1.0
+        if scaredTimer > 0:
+            speed = SCARED_SPEED
+
+        (x, y) = self._positions[index]
+        (dx, dy) = Actions.directionToVector(action, speed)
+        position = (x + dx, y + dy)
+
+        # Time passes, and a ghost that stops being scared snaps back onto the grid.
+        if scaredTimer > 0:
+            scaredTimer -= 1
+            if scaredTimer == 0:
+                position = (int(position[0] + 0.5), int(position[1] + 0.5))
+
+        self._setAgent(index, position, action, scaredTimer)
+        self._checkCollision(index)
+
+    def _checkCollision(self, index):
+        (pacmanX, pacmanY) = self._positions[0]
+        (ghostX, ghostY) = self._positions[index]
+        if abs(pacmanX - ghostX) + abs(pacmanY - ghostY) > COLLISION_TOLERANCE:
+            return
+
+        if self._scaredTimers[index] > 0:
+            self._score += GHOST_POINTS
+            (position, direction) = self._spawns[index]
+            self._setAgent(index, position, direction, 0)
+        elif not self._win:
+            self._score -= LOSE_POINTS
+            self._lose = True
+
+    def getLegalActions(self, agentIndex = 0):
+        if self._win or self._lose:
+            return []
+
+        position = self._positions[agentIndex]
+        if agentIndex == 0:
+            return self._exits[position] + [Directions.STOP]
+
+        # Between cells (scared ghosts move half steps), a ghost can only keep going.
+        (x, y) = position
+        if x != int(x) or y != int(y):
+            return [self._directions[agentIndex]]
+
+        # Ghosts cannot stop, or turn around unless they have to.
+        legalMoves = list(self._exits[position])
+        reverse = Directions.REVERSE.get(self._directions[agentIndex])
+        if reverse in legalMoves and len(legalMoves) > 1:
+            legalMoves.remove(reverse)
+
+        return legalMoves
+
+    def getLegalPacmanActions(self):
+        return self.getLegalActions(0)
+
+    def generateSuccessor(self, agentIndex, action):
+        """
+        A copy of this state, with the move made (for code that wants a state of its own).
+        """
+
+        successor = self.copy()
+        successor.push(agentIndex, action)
+        return successor
+
+    def generatePacmanSuccessor(self, action):
+        return self.generateSuccessor(0, action)
+
+    def copy(self):
+        """
+        A state of its own, as this one is now (with no moves to pop).
+        """
+
+        state = SearchState.__new__(SearchState)
+        state.__dict__.update(self.__dict__)
+
+        state._positions = list(self._positions)
+        state._directions = list(self._directions)
+        state._scaredTimers = list(self._scaredTimers)
+        state._views = [AgentView(state, index) for index in range(len(self._positions))]
+        state._undo = []
+        state._journal = []
+
+        return state
+
+    def getFood(self):
+        """
+        The food as a `FoodGrid` (or at the root, the real state's grid).
+        Grids are made when first asked for, and the same food gets the same grid
+        (the first `MAX_FOOD_GRIDS` of them), so grids can be cached by identity,
+        like the grids of real states.
+        """
+
+        food = self._food
+        if food is None:
+            food = self._foodGrids.get(self._foodBits)
+            if food is None:
+                if len(self._foodGrids) >= MAX_FOOD_GRIDS:
+                    self._foodGrids.clear()
+
+                food = FoodGrid(self._foodBits, self._width, self._height)
+                self._foodGrids[self._foodBits] = food
+
+            self._food = food
+
+        return food
+
+    def getNumFood(self):
+        return self._numFood
+
+    def hasFood(self, x, y):
+        return (self._foodBits >> (x * self._height + y)) & 1 == 1
+
+    def getCapsules(self):
+        return self._capsules
+
+    def getWalls(self):
+        return self._walls
+
+    def hasWall(self, x, y):
+        return self._walls[x][y]
+
+    def getInitialLayout(self):
+        return self._layout
+
+    def getScore(self):
+        return self._score
+
+    def isWin(self):
+        return self._win
+
+    def isLose(self):
+        return self._lose
+
+    def isOver(self):
+        return self._win or self._lose
+
+    def getNumAgents(self):
+        return len(self._positions)
+
+    def getAgentState(self, agentIndex):
+        return self._views[agentIndex]
+
+    def getAgentStates(self):
+        return list(self._views)
+
+    def getAgentPosition(self, agentIndex):
+        return self._positions[agentIndex]
+
+    def getPacmanState(self):
+        return self._views[0]
+
+    def getPacmanPosition(self):
+        return self._positions[0]
+
+    def getGhostStates(self):
+        return self._views[1:]
+
+    def getGhostState(self, agentIndex):
+        return self._views[agentIndex]
+
+    def getGhostPosition(self, agentIndex):
+        return self._positions[agentIndex]
+
+    def getGhostPositions(self):
+        return self._positions[1:]
+
+class AgentView(object):
+    """
+    The getters of a `pacai.core.agentstate.AgentState`, reading an agent of a `SearchState`
+    as it is at the time of the call.
+    """
+
+    __slots__ = ('_state', '_index')
+
+    def __init__(self, state, index):
+        self._state = state
+        self._index = index
+
+    def getPosition(self):
+        return self._state._positions[self._index]
+
+    def getNearestPosition(self):
+        (x, y) = self.getPosition()
+        return (int(x + 0.5), int(y + 0.5))
+
+    def getDirection(self):
+        return self._state._directions[self._index]
+
+    def getScaredTimer(self):
+        return self._state._scaredTimers[self._index]
+
+    def isScared(self):
+        return self._state._scaredTimers[self._index] > 0
+
+    def isPacman(self):
+        return self._index == 0
+
+    def isGhost(self):
+        return self._index != 0
+
+class FoodGrid(object):
+    """
+    A read-only food grid (the parts of `pacai.core.grid.Grid` that food is read with),
+    for the pellets set in `bits` (see `SearchState`).
+    """
+
+    __slots__ = ('bits', '_width', '_height')
+
+    def __init__(self, bits, width, height):
+        self.bits = bits
+        self._width = width
+        self._height = height
+
+    def __getitem__(self, x):
+        column = self.bits >> (x * self._height)
+        return [(column >> y) & 1 == 1 for y in range(self._height)]
+
+    def getWidth(self):
+        return self._width
+
+    def getHeight(self):
+        return self._height
+
+    def count(self, item = True):
+        pellets = bin(self.bits).count('1')
+        if item:
+            return pellets
+
+        return self._width * self._height - pellets
+
+    def asList(self, key = True):
+        if not key:
+            return [(x, y) for x in range(self._width) for y in range(self._height)
+                    if not self[x][y]]
+
+        positions = []
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            positions.append(divmod(lowest.bit_length() - 1, self._height))
+            bits ^= lowest
+
+        return positions
+
+    def copy(self):
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, FoodGrid) and self.bits == other.bits
+
+    def __hash__(self):
+        return hash(self.bits)
+
+# The exit table of the last walls seen (see `exitTable`).
+_exitCache = {}
+
+def exitTable(walls):
+    """
+    {(x, y): [directions out of the cell that are not into a wall]} for every open cell,
+    in the order pacai lists legal actions.
+    Kept for the last walls asked for, since they stay the same through a game.
+    """
+
+    if _exitCache.get('walls') is walls:
+        return _exitCache['exits']
+
+    exits = {}
+    for x in range(walls.getWidth()):
+        for y in range(walls.getHeight()):
+            if walls[x][y]:
+                continue
+
+            exits[(x, y)] = []
+            for direction in CARDINAL_DIRECTIONS:
+                (dx, dy) = Actions.directionToVector(direction)
+                (nextX, nextY) = (int(x + dx), int(y + dy))
+                if 0 <= nextX < walls.getWidth() and 0 <= nextY < walls.getHeight() \
+                        and not walls[nextX][nextY]:
+                    exits[(x, y)].append(direction)
+
+    _exitCache['walls'] = walls
+    _exitCache['exits'] = exits
+    return exits
+
+def makeMove(gameState, agentIndex, action, nextAgent, stateHash = None, hasher = None):
+    """
+    Returns (the state after `agentIndex` makes `action`, its hash), for a search.
+    A `SearchState` makes the move in place (and hashes itself), and `undoMove` takes it back.
+    Any other state generates a successor (hashed from `stateHash` by `hasher`, if given,
+    with `nextAgent` to move), and `undoMove` leaves it alone.
+    """
+
+    if isinstance(gameState, SearchState):
+        gameState.push(agentIndex, action)
+        return (gameState, gameState.hash)
+
+    successor = gameState.generateSuccessor(agentIndex, action)
+    childHash = None
+    if hasher is not None:
+        childHash = hasher.successorHash(stateHash, gameState, successor, agentIndex, nextAgent)
+
+    return (successor, childHash)
+
+def undoMove(gameState):
+    """
+    Take back a `makeMove` on `gameState` (the state the move was made on).
+    """
+
+    if isinstance(gameState, SearchState):
+        gameState.pop()
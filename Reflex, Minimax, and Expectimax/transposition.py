@@ -0,0 +1,324 @@
+"""
+Transposition tables (and a leaf evaluation cache) for the game tree searches
+in `pacai.student.multiagents`.
+
+A game state is hashed Zobrist-style: every feature of the state (an agent's position,
+a ghost's direction or scared timer, a pellet, a capsule, the score, and the agent to move)
+has its own random 64-bit key, and the hash is the XOR of the keys of the features present.
+So a successor's hash comes from its parent's by XORing out what changed and XORing in what
+replaced it, instead of walking the whole state again.
+"""
+
+import collections
+import random
+
+# Bound types for stored values.
+# Like `pacai.student.alphaBeta`, a value is only a bound if it falls strictly outside the window.
+EXACT = 0
+LOWER = 1                       # the true value is at least the stored one (a beta cutoff)
+UPPER = 2                       # the true value is at most the stored one (failed low)
+
+DEFAULT_TABLE_SIZE = 1 << 16
+DEFAULT_CACHE_SIZE = 1 << 17
+DEFAULT_SEED = 0
+
+class ZobristHasher(object):
+    """
+    Hashes `pacai.bin.pacman.PacmanGameState`s (plus the agent to move) into 64-bit integers.
+
+    Keys are drawn the first time a feature is seen, so positions do not need to be known up
+    front (scared ghosts can stand between cells, at half positions).
+    Pacman's direction is left out, since it does not change what he can do next,
+    but ghost directions are in (a ghost cannot turn around).
+    The score is in as well, so states are only equal if they are worth the same.
+    """
+
+    def __init__(self, seed = DEFAULT_SEED):
+        self._random = random.Random(seed)
+        self._keys = {}
+
+    def key(self, feature):
+        """
+        The key of one feature, e.g. ('food', (x, y)).
+        """
+
+        key = self._keys.get(feature)
+        if key is None:
+            key = self._random.getrandbits(64)
+            self._keys[feature] = key
+
+        return key
+
+    def agentKey(self, agentIndex, position, direction, scaredTimer):
+        """
+        The key of everything hashed about one agent.
+        """
+
+        key = self.key(('position', agentIndex, position))
+        if agentIndex != 0:
+            key ^= self.key(('direction', agentIndex, direction))
+            key ^= self.key(('scared', agentIndex, scaredTimer))
+
+        return key
+
+    def _agentKey(self, agentIndex, agentState):
+        return self.agentKey(agentIndex, agentState.getPosition(), agentState.getDirection(),
+                agentState.getScaredTimer())
+
+    def hash(self, gameState, agentIndex = 0):
+        """
+        Hash a whole state, with `agentIndex` to move.
+        """
+
+        key = self.key(('toMove', agentIndex)) ^ self.key(('score', gameState.getScore()))
+
+        for index in range(gameState.getNumAgents()):
+            key ^= self._agentKey(index, gameState.getAgentState(index))
+
+        for food in gameState.getFood().asList():
+            key ^= self.key(('food', food))
+
+        for capsule in gameState.getCapsules():
+            key ^= self.key(('capsule', capsule))
+
+        return key
+
+    def successorHash(self, parentHash, parentState, childState, agentIndex, nextAgent):
+        """
+        The hash of `childState`, where `agentIndex` just moved in `parentState` (hashed as
+        `parentHash`), and `nextAgent` moves next.
+        """
+
+        key = parentHash ^ self.key(('toMove', agentIndex)) ^ self.key(('toMove', nextAgent))
+
+        if parentState.getScore() != childState.getScore():
+            key ^= self.key(('score', parentState.getScore()))
+            key ^= self.key(('score', childState.getScore()))
+
+        # Any agent can change: the mover, ghosts scared by a capsule, or eaten ghosts.
+        for index in range(childState.getNumAgents()):
+            parentAgent = parentState.getAgentState(index)
+            childAgent = childState.getAgentState(index)
+            if (parentAgent.getPosition() != childAgent.getPosition()
+                    or (index != 0 and (parentAgent.getDirection() != childAgent.getDirection()
+                        or parentAgent.getScaredTimer() != childAgent.getScaredTimer()))):
+                key ^= self._agentKey(index, parentAgent) ^ self._agentKey(index, childAgent)
+
+        # Only Pacman eats, and only where he ends up.
+        if agentIndex == 0:
+            (x, y) = childState.getPacmanPosition()
+            position = (int(x), int(y))
+            if parentState.hasFood(*position) and not childState.hasFood(*position):
+                key ^= self.key(('food', position))
+
+            if position in parentState.getCapsules() and position not in childState.getCapsules():
+                key ^= self.key(('capsule', position))
+
+        return key
+
+class TableEntry(object):
+    """
+    One stored search result: the value of a state searched `depth` plies deep,
+    whether that value is exact or a bound, and the best move found there.
+    """
+
+    __slots__ = ('key', 'depth', 'value', 'bound', 'move', 'generation')
+
+    def __init__(self, key, depth, value, bound, move, generation):
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.bound = bound
+        self.move = move
+        self.generation = generation
+
+class TranspositionTable(object):
+    """
+    A fixed number of slots (rounded up to a power of two), indexed by the low bits of a
+    `ZobristHasher` hash, so memory never grows past `size` entries.
+
+    When two states want the same slot, the new result replaces the old one if it is for the
+    same state, the old one is from an earlier search (see `TranspositionTable.newSearch`),
+    or the new one was searched at least as deep (deep results are the expensive ones to redo).
+
+    A result searched deeper than needed is a better answer, but not the same one:
+    with `reuseDeeper` off, only results of exactly the depth asked for are used,
+    so a fixed-depth search returns the same values however full the table is.
+    """
+
+    def __init__(self, size = DEFAULT_TABLE_SIZE, reuseDeeper = True):
+        self.reuseDeeper = reuseDeeper
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+
+        self._mask = self.size - 1
+        self._slots = [None] * self.size
+        self.generation = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def newSearch(self):
+        """
+        Start a new search (i.e. a new move): entries from older searches can still be hit,
+        but are the first to be replaced.
+        """
+
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Get the `TableEntry` stored for a hash (or None).
+        """
+
+        self.probes += 1
+        entry = self._slots[key & self._mask]
+        if entry is None or entry.key != key:
+            return None
+
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, value, bound, move):
+        index = key & self._mask
+        old = self._slots[index]
+        if old is not None and old.key != key:
+            if old.generation == self.generation and depth < old.depth:
+                return
+
+            self.replacements += 1
+
+        self._slots[index] = TableEntry(key, depth, value, bound, move, self.generation)
+        self.stores += 1
+
+    def lookup(self, key, depth, alpha = float('-inf'), beta = float('inf')):
+        """
+        Probe for a state that needs a `depth` deep search within the (alpha, beta) window.
+
+        Returns (value, entry): value is not None if the stored result settles the search
+        (an exact value, or a bound outside the window), and entry is the probed `TableEntry`
+        (e.g. for its move), or None.
+        Results searched deeper than `depth` are used too, if `reuseDeeper` is on.
+        """
+
+        entry = self.probe(key)
+        if entry is None or entry.depth < depth or (entry.depth > depth and not self.reuseDeeper):
+            return (None, entry)
+
+        if (entry.bound == EXACT
+                or (entry.bound == LOWER and entry.value > beta)
+                or (entry.bound == UPPER and entry.value < alpha)):
+            return (entry.value, entry)
+
+        return (None, entry)
+
+    def __len__(self):
+        return len([entry for entry in self._slots if entry is not None])
+
+    def __str__(self):
+        return ('%d of %d slots used, %d probes, %d hits, %d stores, %d replacements'
+                % (len(self), self.size, self.probes, self.hits, self.stores, self.replacements))
+
+class EvaluationCache(object):
+    """
+    Leaf values by `ZobristHasher` hash, kept from one move to the next
+    (the same leaves come up again and again in the searches of consecutive moves).
+    A hash covers the whole state, so a cached value is good for as long as the evaluation
+    function only looks at the state.
+
+    Entries are grouped by how much food their state has left.
+    Food only ever gets eaten, so once the game is down to some number of pellets,
+    states with more can never come up again: `dropAbove` throws their groups away.
+    Past `maxEntries`, one entry goes for every new one: the least recently used entry
+    of the group with the most food (the oldest generation still around).
+    `hits`, `misses`, and `evictions` count lookups and dropped entries.
+    """
+
+    def __init__(self, maxEntries = DEFAULT_CACHE_SIZE):
+        self.maxEntries = maxEntries
+        self._groups = {}                           # food left : OrderedDict(hash : value)
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def value(self, evaluate, gameState, stateHash):
+        """
+        `evaluate(gameState)`, from the cache if `stateHash` is in it.
+        """
+
+        numFood = gameState.getNumFood()
+        group = self._groups.get(numFood)
+        if group is None:
+            group = collections.OrderedDict()
+            self._groups[numFood] = group
+
+        value = group.get(stateHash)
+        if value is not None:
+            self.hits += 1
+            group.move_to_end(stateHash)
+            return value
+
+        self.misses += 1
+        value = evaluate(gameState)
+        group[stateHash] = value
+        self._size += 1
+        if self._size > self.maxEntries:
+            self._evictOne()
+
+        return value
+
+    def dropAbove(self, numFood):
+        """
+        Drop every entry for a state with more than `numFood` pellets left.
+        """
+
+        for groupFood in [groupFood for groupFood in self._groups if groupFood > numFood]:
+            self._dropGroup(groupFood)
+
+    def _evictOne(self):
+        groupFood = max(self._groups)
+        group = self._groups[groupFood]
+        group.popitem(last = False)
+        if len(group) == 0:
+            del self._groups[groupFood]
+
+        self._size -= 1
+        self.evictions += 1
+
+    def _dropGroup(self, numFood):
+        group = self._groups.pop(numFood)
+        self._size -= len(group)
+        self.evictions += len(group)
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
+
+    def __len__(self):
+        return self._size
+
+    def __str__(self):
+        return ('%d entries in %d groups, %d hits, %d misses (%.1f%% hit), %d evictions'
+                % (len(self), len(self._groups), self.hits, self.misses, 100.0 * self.hitRate(),
+                    self.evictions))
+
+def boundType(value, alpha, beta):
+    """
+    The bound type of a value searched within the (alpha, beta) window.
+    """
+
+    if value < alpha:
+        return UPPER
+
+    if value > beta:
+        return LOWER
+
+    return EXACT
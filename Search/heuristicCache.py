@@ -0,0 +1,132 @@
+"""
+Memoization for heuristics (and other per-state values) with a bound on memory.
+"""
+
+import collections
+import itertools
+import weakref
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Rough cost of one entry: the ordered dict's node and hash slot,
+# plus a small tuple key (a problem token and a state) and a number.
+DEFAULT_ENTRY_BYTES = 320
+
+_MISSING = object()
+
+class LRUCache(object):
+    """
+    A dictionary that drops its least recently used entries once their estimated size
+    passes `maxBytes`.
+
+    Every entry is charged a fixed `entryBytes`, so the cap is really a count of
+    maxBytes // entryBytes entries (at least one).
+    Measuring each key instead would cost more than most of the values being cached.
+    `hits`, `misses`, and `evictions` count what happened across every lookup.
+    """
+
+    def __init__(self, maxBytes = DEFAULT_MAX_BYTES, entryBytes = DEFAULT_ENTRY_BYTES):
+        self.maxBytes = maxBytes
+        self.entryBytes = entryBytes
+        self.maxEntries = max(1, maxBytes // entryBytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = collections.OrderedDict()  # key : value, oldest first
+
+    @property
+    def bytes(self):
+        """
+        The estimated size of the entries held now.
+        """
+
+        return len(self._entries) * self.entryBytes
+
+    def get(self, key, default = None):
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self.maxEntries:
+            self._entries.popitem(last = False)
+            self.evictions += 1
+
+        self._entries[key] = value
+
+    def clear(self):
+        """
+        Drop every entry (the counters keep running).
+        """
+
+        self._entries.clear()
+
+    def hitRate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return ('%d entries (%.1f KB), %d hits, %d misses (%.1f%% hit rate), %d evictions'
+                % (len(self), self.bytes / 1024.0, self.hits, self.misses,
+                    100.0 * self.hitRate(), self.evictions))
+
+class CachedHeuristic(object):
+    """
+    Wraps a heuristic `(state, problem) -> number` so each state is only evaluated once
+    (until it is evicted from `cache`, an `LRUCache` of at most `maxBytes`).
+
+    `key` turns a state into the hashable value it is cached under
+    (by default the state itself); use it to cache under something smaller than the state.
+    Values are only valid for one problem, so every problem the wrapper sees gets its own
+    token that is cached along with the key.
+    Entries of problems that are gone are never hit again, and just age out of the cache.
+
+    Only wrap heuristics that searches ask about the same state many times (like IDA*);
+    A* rarely does, so there the lookup just adds to the cost of every call.
+    """
+
+    def __init__(self, heuristic, key = None, maxBytes = DEFAULT_MAX_BYTES,
+            entryBytes = DEFAULT_ENTRY_BYTES):
+        self.heuristic = heuristic
+        self.key = key
+        self.cache = LRUCache(maxBytes, entryBytes)
+
+        self.__name__ = getattr(heuristic, '__name__', self.__class__.__name__)
+        self.__doc__ = heuristic.__doc__
+
+        self._tokens = weakref.WeakKeyDictionary()     # problem : token
+        self._counter = itertools.count()
+
+    def __call__(self, state, problem):
+        token = self._tokens.get(problem)
+        if token is None:
+            token = next(self._counter)
+            self._tokens[problem] = token
+
+        key = (token, state)
+        if self.key is not None:
+            key = (token, self.key(state))
+
+        value = self.cache.get(key)
+        if value is None:
+            value = self.heuristic(state, problem)
+            self.cache.put(key, value)
+
+        return value
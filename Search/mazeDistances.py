@@ -0,0 +1,113 @@
+"""
+All-pairs maze distances for a layout, computed once and shared by heuristics and agents.
+"""
+
+import array
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+UNREACHABLE = 0xFFFF
+
+class MazeDistances(object):
+    """
+    The shortest maze distance between every pair of open cells in a layout.
+
+    Every open cell gets an index, and one BFS per cell fills in its row of a flat
+    unsigned-short array (n * n entries), so a lookup is a dictionary read and an array read.
+    Use `getMazeDistances` instead of building these directly, so each layout is only done once.
+    """
+
+    def __init__(self, walls):
+        self.walls = walls
+
+        # Index every open cell.
+        self.positions = []
+        self._indexes = {}
+        for x in range(walls.getWidth()):
+            for y in range(walls.getHeight()):
+                if not walls[x][y]:
+                    self._indexes[(x, y)] = len(self.positions)
+                    self.positions.append((x, y))
+
+        # The (next index, action) moves out of every open cell, and just the next indexes.
+        self.moves = []
+        self.neighbors = []
+        for (x, y) in self.positions:
+            moves = []
+            for action in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(action)
+                nextIndex = self._indexes.get((int(x + dx), int(y + dy)))
+                if nextIndex is not None:
+                    moves.append((nextIndex, action))
+
+            self.moves.append(tuple(moves))
+            self.neighbors.append(tuple([nextIndex for (nextIndex, action) in moves]))
+
+        self.size = len(self.positions)
+        self._distances = array.array('H', [UNREACHABLE]) * (self.size * self.size)
+        for source in range(self.size):
+            self._fillRow(source)
+
+    def _fillRow(self, source):
+        """
+        BFS from one cell, writing its distances into the table.
+        """
+
+        distances = self._distances
+        offset = source * self.size
+        distances[offset + source] = 0
+
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            nextLayer = []
+            for index in layer:
+                for nextIndex in self.neighbors[index]:
+                    if distances[offset + nextIndex] == UNREACHABLE:
+                        distances[offset + nextIndex] = depth
+                        nextLayer.append(nextIndex)
+
+            layer = nextLayer
+
+    def getIndex(self, position):
+        """
+        Get the table index of an open (x, y) cell (None for walls and positions off the grid).
+        """
+
+        return self._indexes.get(position)
+
+    def getDistance(self, position1, position2):
+        """
+        Get the maze distance between two open (x, y) cells
+        (float('inf') if one cannot be reached from the other).
+        """
+
+        return self.getIndexDistance(self._indexes[position1], self._indexes[position2])
+
+    def getIndexDistance(self, index1, index2):
+        """
+        Like `MazeDistances.getDistance`, but with table indexes instead of positions.
+        """
+
+        distance = self._distances[index1 * self.size + index2]
+        if distance == UNREACHABLE:
+            return float('inf')
+
+        return distance
+
+_cache = {}
+
+def getMazeDistances(walls):
+    """
+    Get the `MazeDistances` for a wall grid, building it the first time a layout is seen.
+    """
+
+    key = (walls.getWidth(), walls.getHeight(), tuple(walls.asList()))
+    distances = _cache.get(key)
+    if distances is None:
+        distances = MazeDistances(walls)
+        _cache[key] = distances
+
+    return distances
@@ -1,157 +1,1006 @@
-"""
-In this file, you will implement generic search algorithms which are called by Pacman agents.
-"""
-
-from pacai.util import stack
-from pacai.util import queue
-from pacai.util import priorityQueue
-
-def depthFirstSearch(problem):
-    """
-    Search the deepest nodes in the search tree first [p 85].
-
-    Your search algorithm needs to return a list of actions that reaches the goal.
-    Make sure to implement a graph search algorithm [Fig. 3.7].
-
-    To get started, you might want to try some of these simple commands to
-    understand the search problem that is being passed in:
-    ```
-    print("Start: %s" % (str(problem.startingState())))
-    print("Is the start a goal?: %s" % (problem.isGoal(problem.startingState())))
-    print("Start's successors: %s" % (problem.successorStates(problem.startingState())))
-    ```
-    """
-
-    nodeDict = {}                                   # dictionary storing child : (parent,  action)
-    fringe = stack.Stack()                          # create fringe (stack)
-    fringe.push(problem.startingState())
-    visitHistory = []                               # history of visited nodes
-
-    while not fringe.isEmpty():
-        node = fringe.pop()
-        if problem.isGoal(node):                    # reached goal
-            (parent, action, cost, aList) = nodeDict[node]
-            actionList = list(aList)
-            return actionList
-        if node not in visitHistory:                # expand successors to stack (avoiding explored)
-            for (state, action, cost) in problem.successorStates(node):
-                if state not in visitHistory:
-                    # caculate forward cost and actionlist to successor
-                    if node == problem.startingState():     # node is root
-                        aList = []
-                        aList.append(action)
-                        nodeDict[state] = (node, action, cost, tuple(aList))
-                    else:                                   # node is non root
-                        (pState, pAction, pCost, pList) = nodeDict[node]    # Parent node
-                        pList = list(pList)
-                        pList.append(action)
-                        nodeDict[state] = (node, action, cost + pCost, tuple(pList))
-                fringe.push(state)
-        visitHistory.append(node)
-
-    raise "No DFS path avalaible"           # stack is emptied, failed to find goal
-
-def breadthFirstSearch(problem):
-    """
-    Search the shallowest nodes in the search tree first. [p 81]
-    """
-
-    nodeDict = {}                                   # dictionary storing child : (parent,  action)
-    fringe = queue.Queue()                          # create fringe (queue)
-    fringe.push(problem.startingState())
-    visitHistory = []                               # history of visited nodes
-
-    while not fringe.isEmpty():
-        node = fringe.pop()
-        if problem.isGoal(node):                    # reached goal
-            (parent, action, cost, aList) = nodeDict[node]
-            actionList = list(aList)
-            return actionList
-        if node not in visitHistory:                # expand successors to stack (avoiding explored)
-            for (state, action, cost) in problem.successorStates(node):
-                if state not in visitHistory:
-                    # caculate forward cost and actionlist to successor
-                    if node == problem.startingState():     # node is root
-                        aList = []
-                        aList.append(action)
-                        nodeDict[state] = (node, action, cost, tuple(aList))
-                    else:                                   # node is non root
-                        (pState, pAction, pCost, pList) = nodeDict[node]    # Parent node
-                        pList = list(pList)
-                        pList.append(action)
-                        nodeDict[state] = (node, action, cost + pCost, tuple(pList))
-                fringe.push(state)
-        visitHistory.append(node)
-
-    raise "No BFS path avalaible"           # queue is emptied, failed to find goal
-
-def uniformCostSearch(problem):
-    """
-    Search the node of least total cost first.
-    """
-
-    nodeDict = {}                                   # dictionary storing child : (parent,  action)
-    fringe = priorityQueue.PriorityQueue()          # create fringe (priority queue)
-    fringe.push(problem.startingState(), 0)
-    visitHistory = []                               # history of visited nodes
-
-    while not fringe.isEmpty():
-        node = fringe.pop()
-        if problem.isGoal(node):                    # reached goal
-            (parent, action, cost, aList) = nodeDict[node]
-            actionList = list(aList)
-            return actionList
-        if node not in visitHistory:                # expand successors to stack (avoiding explored)
-            for (state, action, cost) in problem.successorStates(node):
-                if state not in visitHistory:
-                    # caculate forward cost and actionlist to successor
-                    if node == problem.startingState():     # node is root
-                        aList = []
-                        aList.append(action)
-                        nodeDict[state] = (node, action, cost, tuple(aList))
-                    else:                                   # node is non root
-                        (pState, pAction, pCost, pList) = nodeDict[node]    # Parent node
-                        pList = list(pList)
-                        pList.append(action)
-                        nodeDict[state] = (node, action, cost + pCost, tuple(pList))
-                fringe.push(state, cost)
-        visitHistory.append(node)
-
-    raise "No UCS path avalaible"           # priority queue is emptied, failed to find goal
-
-def aStarSearch(problem, heuristic):
-    """
-    Search the node that has the lowest combined cost and heuristic first.
-    """
-
-    nodeDict = {}                                   # dictionary of child : (parent,  action, cost)
-    fringe = priorityQueue.PriorityQueue()          # create fringe (priority queue)
-    fringe.push(problem.startingState(), 0 + heuristic(problem.startingState(), problem))
-    visitHistory = []                               # history of visited nodes
-
-    while not fringe.isEmpty():
-        node = fringe.pop()
-        if problem.isGoal(node):                    # reached goal
-            (parent, action, cost, aList) = nodeDict[node]
-            actionList = list(aList)
-            return actionList
-        if node not in visitHistory:                # expand successors to stack (avoiding explored)
-            for (state, action, cost) in problem.successorStates(node):
-                totalCost = 1
-                if state not in visitHistory:
-                    # caculate forward cost and actionlist to successor
-                    if node == problem.startingState():     # node is root
-                        aList = []
-                        aList.append(action)
-                        nodeDict[state] = (node, action, cost, tuple(aList))
-                        totalCost = cost
-                    else:                                   # node is non root
-                        (pState, pAction, pCost, pList) = nodeDict[node]    # Parent node
-                        pList = list(pList)
-                        pList.append(action)
-                        nodeDict[state] = (node, action, cost + pCost, tuple(pList))
-                        totalCost = cost + pCost
-                fringe.push(state, totalCost + heuristic(state, problem))
-        visitHistory.append(node)
-
-    raise "No A* path avalaible"            # priority queue is emptied, failed to find goal
+"""
+In this file, you will implement generic search algorithms which are called by Pacman agents.
+
+Every search also takes an optional `stats` (a `pacai.student.searchStats.SearchStats`)
+that it fills in with node counts and timings.
+"""
+
+import copy
+import heapq
+import itertools
+import time
+
+from pacai.core.directions import Directions
+from pacai.util import stack
+from pacai.util import queue
+from pacai.util import priorityQueue
+from pacai.student import searchStats
+
+def _reconstructPath(parents, state):
+    """
+    Follow the parent pointers back from `state` to the root and return the actions taken
+    (in order from the root).
+    """
+
+    actions = []
+    link = parents[state]
+    while link is not None:
+        (state, action) = link
+        actions.append(action)
+        link = parents[state]
+
+    actions.reverse()
+    return actions
+
+def _graphSearch(problem, fringe, stats, priority = None, lastParent = False):
+    """
+    Generic graph search shared by all of the search functions below.
+
+    `fringe` is one of the `pacai.util` containers (stack, queue, or priority queue).
+    If `priority` is given, the fringe must be a priority queue and every node is pushed with
+    `priority(state, pathCost)`.
+    Counts go into `stats` (a `pacai.student.searchStats.SearchStats`).
+
+    Fringe entries only hold (state, parent, action, pathCost).
+    Once a node is expanded, its parent pointer goes into a dictionary (which doubles as the
+    closed set), and the action list is only rebuilt once we pop the goal.
+
+    With a priority queue we also keep the best known path cost (g) of every state on the fringe.
+    A successor is only pushed if it improves on that cost, and entries that were superseded
+    by a cheaper push are dropped when they are popped (lazy deletion instead of decrease-key).
+    So each state is expanded at most once, with the cheapest cost found for it.
+
+    By default a node keeps the parent that first pushed it.
+    With `lastParent` (breadth-first search), it instead keeps the last parent at the same depth
+    as the first one to generate it before it is expanded, which is how BFS has always broken
+    ties between equally short paths. Deeper parents never replace a pointer,
+    so the path is still the shallowest.
+
+    Returns None if the fringe empties without reaching a goal.
+    """
+
+    successorStates = stats.wrapSuccessors(problem.successorStates)
+    start = problem.startingState()
+    parents = {}                                    # expanded state : (parent, action)
+    bestCost = {start: 0}                           # state : best known g on the fringe
+    depths = {start: 0}                             # lastParent: expanded state : depth
+    lastGenerated = {}                              # lastParent: state : (parent, action, depth)
+    fringeSize = 1
+
+    if priority is None:
+        fringe.push((start, None, None, 0))
+    else:
+        fringe.push((start, None, None, 0), priority(start, 0))
+    stats.generated += 1
+
+    while not fringe.isEmpty():
+        (node, parent, action, pathCost) = fringe.pop()
+        fringeSize -= 1
+        if node in parents or (priority is not None and pathCost > bestCost[node]):
+            stats.staleSkipped += 1                 # expanded already, or superseded
+            continue
+
+        if parent is None:                          # node is root
+            parents[node] = None
+        else:
+            if lastParent:
+                (parent, action, depth) = lastGenerated.pop(node)
+                depths[node] = depth + 1
+
+            parents[node] = (parent, action)
+
+        if problem.isGoal(node):                    # reached goal
+            stats.updateClosed(len(parents))
+            return _reconstructPath(parents, node)
+
+        stats.expanded += 1
+        for (state, action, cost) in successorStates(node):
+            if state in parents:                    # avoid explored
+                continue
+
+            if lastParent:
+                depth = depths[node]
+                generated = lastGenerated.get(state)
+                if generated is None or generated[2] == depth:
+                    lastGenerated[state] = (node, action, depth)
+
+            childCost = pathCost + cost
+            if priority is None:
+                fringe.push((state, node, action, childCost))
+            elif childCost < bestCost.get(state, float('inf')):
+                bestCost[state] = childCost
+                fringe.push((state, node, action, childCost), priority(state, childCost))
+            else:
+                continue
+
+            stats.generated += 1
+            fringeSize += 1
+
+        stats.updateFringe(fringeSize)
+
+    stats.updateClosed(len(parents))
+    return None
+
+def depthFirstSearch(problem, stats = None):
+    """
+    Search the deepest nodes in the search tree first [p 85].
+
+    Your search algorithm needs to return a list of actions that reaches the goal.
+    Make sure to implement a graph search algorithm [Fig. 3.7].
+
+    To get started, you might want to try some of these simple commands to
+    understand the search problem that is being passed in:
+    ```
+    print("Start: %s" % (str(problem.startingState())))
+    print("Is the start a goal?: %s" % (problem.isGoal(problem.startingState())))
+    print("Start's successors: %s" % (problem.successorStates(problem.startingState())))
+    ```
+    """
+
+    stats = searchStats.begin(stats, 'depthFirstSearch')
+    actions = _graphSearch(problem, stack.Stack(), stats)
+    stats.finish(actions)
+    if actions is None:                     # stack is emptied, failed to find goal
+        raise Exception("No DFS path available")
+
+    return actions
+
+def breadthFirstSearch(problem, stats = None):
+    """
+    Search the shallowest nodes in the search tree first. [p 81]
+    """
+
+    stats = searchStats.begin(stats, 'breadthFirstSearch')
+    actions = _graphSearch(problem, queue.Queue(), stats, lastParent = True)
+    stats.finish(actions)
+    if actions is None:                     # queue is emptied, failed to find goal
+        raise Exception("No BFS path available")
+
+    return actions
+
+def uniformCostSearch(problem, stats = None):
+    """
+    Search the node of least total cost first.
+    """
+
+    stats = searchStats.begin(stats, 'uniformCostSearch')
+    actions = _graphSearch(problem, priorityQueue.PriorityQueue(), stats,
+            lambda state, pathCost: pathCost)
+    stats.finish(actions)
+    if actions is None:                     # priority queue is emptied, failed to find goal
+        raise Exception("No UCS path available")
+
+    return actions
+
+def aStarSearch(problem, heuristic, stats = None):
+    """
+    Search the node that has the lowest combined cost and heuristic first.
+    """
+
+    stats = searchStats.begin(stats, 'aStarSearch')
+    heuristic = stats.wrapHeuristic(heuristic)
+    actions = _graphSearch(problem, priorityQueue.PriorityQueue(), stats,
+            lambda state, pathCost: pathCost + heuristic(state, problem))
+    stats.finish(actions)
+    if actions is None:                     # priority queue is emptied, failed to find goal
+        raise Exception("No A* path available")
+
+    return actions
+
+def _singleGoal(problem):
+    """
+    Returns the one explicit goal state of `problem` (e.g. `PositionSearchProblem.goal`),
+    or None if the problem does not name a single goal we can search backwards from.
+    """
+
+    goal = getattr(problem, 'goal', None)
+    if goal is None or not problem.isGoal(goal):
+        return None
+
+    return goal
+
+def _predecessors(problem, successorStates, state):
+    """
+    Returns (previousState, action, cost) triples for the moves that lead into `state`,
+    built from `successorStates` (the problem's own, or a timed wrapper of it).
+
+    This assumes every move can be undone by the reverse move (true for grid positions),
+    and that a `costFn` on the problem prices a move by the state it enters
+    (like `pacai.core.search.position.PositionSearchProblem` does).
+    """
+
+    costFn = getattr(problem, 'costFn', None)
+
+    predecessors = []
+    for (previous, action, cost) in successorStates(state):
+        if costFn is not None:
+            cost = costFn(state)
+        predecessors.append((previous, Directions.REVERSE[action], cost))
+
+    return predecessors
+
+def _joinPaths(forward, backward, meet):
+    """
+    Join the forward parent pointers (start -> meet) with the backward ones (meet -> goal).
+    `backward` maps a state to (nextState, action), where action moves from state to nextState.
+    """
+
+    actions = _reconstructPath(forward, meet)
+
+    link = backward[meet]
+    while link is not None:
+        (state, action) = link
+        actions.append(action)
+        link = backward[state]
+
+    return actions
+
+def bidirectionalBreadthFirstSearch(problem, stats = None):
+    """
+    Search the shallowest nodes from both the start and the goal at once,
+    stopping as soon as the two searches touch.
+    Only a single explicit goal can be searched backwards from,
+    so problems without one fall back to `breadthFirstSearch`.
+    """
+
+    goal = _singleGoal(problem)
+    if goal is None:
+        return breadthFirstSearch(problem, stats = stats)
+
+    stats = searchStats.begin(stats, 'bidirectionalBreadthFirstSearch')
+    successorStates = stats.wrapSuccessors(problem.successorStates)
+
+    start = problem.startingState()
+    forward = {start: None}                         # state : (parent, action)
+    backward = {goal: None}                         # state : (child, action)
+    forwardLayer = [start]
+    backwardLayer = [goal]
+    stats.generated += 2
+
+    # Always grow the smaller frontier by one full layer.
+    # With unit steps, the first state generated by both sides is on a shortest path.
+    actions = [] if start == goal else None
+    while actions is None and forwardLayer and backwardLayer:
+        if len(forwardLayer) <= len(backwardLayer):
+            (forwardLayer, meet) = _expandLayer(forwardLayer, forward, backward,
+                    successorStates, stats)
+        else:
+            (backwardLayer, meet) = _expandLayer(backwardLayer, backward, forward,
+                    lambda state: _predecessors(problem, successorStates, state), stats)
+
+        stats.updateFringe(len(forwardLayer) + len(backwardLayer))
+        if meet is not None:
+            actions = _joinPaths(forward, backward, meet)
+
+    stats.updateClosed(len(forward) + len(backward))
+    stats.finish(actions)
+    if actions is None:
+        raise Exception("No BFS path available")
+
+    return actions
+
+def _expandLayer(layer, visited, otherVisited, successors, stats):
+    """
+    Expand one whole BFS layer for one side of a bidirectional search.
+    Returns the next layer and the state where we met the other side (or None).
+    """
+
+    nextLayer = []
+    for node in layer:
+        stats.expanded += 1
+        for (state, action, cost) in successors(node):
+            if state in visited:
+                continue
+
+            visited[state] = (node, action)
+            stats.generated += 1
+            if state in otherVisited:
+                return (nextLayer, state)
+
+            nextLayer.append(state)
+
+    return (nextLayer, None)
+
+def bidirectionalAStarSearch(problem, heuristic, stats = None):
+    """
+    A* from both the start and the goal at once (meet in the middle).
+
+    Both directions use the average of the forward and backward heuristics as their potential,
+    which keeps it consistent in both directions.
+    The backward heuristic is the same `heuristic` evaluated on a copy of the problem whose goal
+    is our start state.
+    We stop once the two smallest fringe keys add up to at least the best meeting cost,
+    at which point that meeting path is optimal.
+    Problems without a single explicit goal fall back to `aStarSearch`.
+    """
+
+    goal = _singleGoal(problem)
+    if goal is None:
+        return aStarSearch(problem, heuristic, stats = stats)
+
+    stats = searchStats.begin(stats, 'bidirectionalAStarSearch')
+    heuristic = stats.wrapHeuristic(heuristic)
+    successorStates = stats.wrapSuccessors(problem.successorStates)
+
+    start = problem.startingState()
+    if start == goal:
+        stats.finish([])
+        return []
+
+    reverseProblem = copy.copy(problem)
+    reverseProblem.goal = start
+
+    def potential(state):
+        return (heuristic(state, problem) - heuristic(state, reverseProblem)) / 2
+
+    # Each side: fringe heap, best known g, pointer towards its root, and closed set.
+    # The backward side stores the negated potential.
+    # The counter breaks ties so that states never have to be compared.
+    sides = [
+        ([(potential(start), 0, 0, start)], {start: 0}, {start: None}, set(), 1,
+                successorStates),
+        ([(-potential(goal), 0, 1, goal)], {goal: 0}, {goal: None}, set(), -1,
+                lambda state: _predecessors(problem, successorStates, state)),
+    ]
+    counter = itertools.count(2)
+    stats.generated += 2
+
+    bestTotal = float('inf')
+    meet = None
+
+    while sides[0][0] and sides[1][0]:
+        if sides[0][0][0][0] + sides[1][0][0][0] >= bestTotal:
+            break
+
+        # Expand the side whose best key is smaller.
+        if sides[0][0][0][0] <= sides[1][0][0][0]:
+            (side, other) = (sides[0], sides[1])
+        else:
+            (side, other) = (sides[1], sides[0])
+
+        (fringe, bestCost, pointers, closed, sign, successors) = side
+        (key, pathCost, count, node) = heapq.heappop(fringe)
+        if node in closed or pathCost > bestCost[node]:
+            stats.staleSkipped += 1
+            continue
+
+        closed.add(node)
+        stats.expanded += 1
+
+        for (state, action, cost) in successors(node):
+            childCost = pathCost + cost
+            if state in closed or childCost >= bestCost.get(state, float('inf')):
+                continue
+
+            bestCost[state] = childCost
+            pointers[state] = (node, action)
+            heapq.heappush(fringe,
+                    (childCost + sign * potential(state), childCost, next(counter), state))
+            stats.generated += 1
+
+            if state in other[1] and childCost + other[1][state] < bestTotal:
+                bestTotal = childCost + other[1][state]
+                meet = state
+
+        stats.updateFringe(len(sides[0][0]) + len(sides[1][0]))
+
+    stats.updateClosed(len(sides[0][3]) + len(sides[1][3]))
+    actions = None
+    if meet is not None:
+        actions = _joinPaths(sides[0][2], sides[1][2], meet)
+
+    stats.finish(actions)
+    if actions is None:
+        raise Exception("No A* path available")
+
+    return actions
+
+IDA_DEFAULT_MAX_CACHED = 100000
+
+def iterativeDeepeningAStarSearch(problem, heuristic, maxCached = IDA_DEFAULT_MAX_CACHED,
+        stats = None):
+    """
+    IDA*: repeated depth-first searches, each cut off once the f-cost (g + h) passes a bound.
+    The first bound is h(start), and each new bound is the smallest f-cost that went over the
+    previous one, so the first goal found is optimal (for an admissible heuristic).
+
+    A depth-first search sees every path to a state, so on grids (where many paths lead
+    to the same cell) plain IDA* takes exponential time.
+    Up to `maxCached` states are kept with the cheapest path cost they were reached by
+    (and the iteration that expanded them), across iterations: a state reached by a costlier
+    path is skipped, and so is one reached again at the same cost in the same iteration
+    (its subtree was already searched under this bound).
+    Once the cache is full, new states are searched without it, like plain IDA*.
+
+    Memory is the current path (plus one successor list per level) and the cache,
+    so with a small `maxCached` this works on state spaces whose fringe would not fit in memory,
+    at the price of re-expanding the shallow nodes on every iteration
+    (`maxCached = 0` is plain IDA*, which is only worth it when memory, not time, is the limit).
+    The heuristic is called again for the same states on every iteration,
+    so it is worth wrapping in a `pacai.student.heuristicCache.CachedHeuristic` here
+    (unlike for A*, which rarely asks about a state twice).
+    """
+
+    stats = searchStats.begin(stats, 'iterativeDeepeningAStarSearch')
+    heuristic = stats.wrapHeuristic(heuristic)
+    successorStates = stats.wrapSuccessors(problem.successorStates)
+
+    start = problem.startingState()
+    stats.generated += 1
+
+    actions = None
+    if problem.isGoal(start):
+        actions = []
+
+    bound = heuristic(start, problem)
+    cache = {}                                      # state : (cheapest path cost, iteration)
+    iteration = 0
+    while actions is None and bound != float('inf'):    # inf: nothing was cut off
+        (actions, bound) = _costBoundedSearch(problem, successorStates, heuristic, start, bound,
+                cache, maxCached, iteration, stats)
+        iteration += 1
+
+    stats.finish(actions)
+    if actions is None:                     # failed to find goal
+        raise Exception("No IDA* path available")
+
+    return actions
+
+def _costBoundedSearch(problem, successorStates, heuristic, start, bound, cache, maxCached,
+        iteration, stats):
+    """
+    One IDA* iteration (an iterative DFS, so long paths do not hit the recursion limit).
+    Returns (actions, None) if a goal was found within `bound`,
+    and (None, smallest f-cost over the bound) otherwise.
+    """
+
+    path = [start]                                  # states from the root to the current node
+    onPath = {start}                                # to skip cycles back onto the path
+    actions = []
+    pathCosts = [0]
+    successors = [iter(successorStates(start))]
+    nextBound = float('inf')
+    stats.expanded += 1
+
+    while successors:
+        nextSuccessor = next(successors[-1], None)
+        if nextSuccessor is None:                   # all successors done, back up
+            successors.pop()
+            pathCosts.pop()
+            onPath.discard(path.pop())
+            if actions:
+                actions.pop()
+            continue
+
+        (state, action, cost) = nextSuccessor
+        if state in onPath:
+            continue
+
+        stats.generated += 1
+        pathCost = pathCosts[-1] + cost
+        f = pathCost + heuristic(state, problem)
+        if f > bound:
+            nextBound = min(nextBound, f)
+            continue
+
+        if problem.isGoal(state):
+            return (actions + [action], None)
+
+        # Skip states already searched by a cheaper path (or this iteration, an equal one).
+        cached = cache.get(state)
+        if cached is not None:
+            (cachedCost, cachedIteration) = cached
+            if pathCost > cachedCost or (pathCost == cachedCost and cachedIteration == iteration):
+                continue
+
+        if cached is not None or len(cache) < maxCached:
+            cache[state] = (pathCost, iteration)
+
+        path.append(state)
+        onPath.add(state)
+        actions.append(action)
+        pathCosts.append(pathCost)
+        successors.append(iter(successorStates(state)))
+        stats.expanded += 1
+        stats.updateFringe(len(path))
+        stats.updateClosed(len(path))
+
+    return (None, nextBound)
+
+SMA_DEFAULT_MAX_NODES = 100000
+
+class _MemoryNode(object):
+    """
+    A search node for `memoryBoundedAStarSearch`.
+    `forgotten` holds the backed-up f-cost of every child that was dropped to free memory,
+    keyed by the child's state, so the child can be regenerated later.
+    """
+
+    __slots__ = ('state', 'parent', 'action', 'pathCost', 'depth', 'f',
+            'children', 'forgotten', 'inFringe', 'version')
+
+    def __init__(self, state, parent, action, pathCost, f):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.pathCost = pathCost
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.f = f
+        self.children = []
+        self.forgotten = {}
+        self.inFringe = False
+        self.version = 0
+
+def memoryBoundedAStarSearch(problem, heuristic, maxNodes = SMA_DEFAULT_MAX_NODES,
+        stats = None):
+    """
+    SMA*: A* that never keeps more than `maxNodes` search nodes in memory.
+
+    When memory is full, the shallowest leaf with the highest f-cost is dropped,
+    and its f-cost is backed up into its parent so the parent knows what the subtree was worth
+    and can regenerate it if everything else turns out worse.
+    f-costs use pathmax (a child is never cheaper than its parent),
+    and a node that is already in memory with a path cost that is no worse is not generated again.
+
+    Returns an optimal path as long as one fits in `maxNodes` nodes;
+    fails if no solution path fits in memory.
+    """
+
+    stats = searchStats.begin(stats, 'memoryBoundedAStarSearch')
+    heuristic = stats.wrapHeuristic(heuristic)
+    successorStates = stats.wrapSuccessors(problem.successorStates)
+
+    start = problem.startingState()
+    root = _MemoryNode(start, None, None, 0, heuristic(start, problem))
+    stats.generated += 1
+
+    inMemory = {start: root}                        # state : node (the cheapest one we hold)
+    bestHeap = []                                   # (f, -depth, ...): deepest lowest-f first
+    worstHeap = []                                  # (-f, depth, ...): shallowest highest-f first
+    counter = itertools.count()
+    numNodes = 1
+    actions = None
+
+    def enqueue(node):
+        # Put the node on the fringe (again). Older heap entries are invalidated by version.
+        node.version += 1
+        node.inFringe = True
+        heapq.heappush(bestHeap, (node.f, -node.depth, next(counter), node.version, node))
+        heapq.heappush(worstHeap, (-node.f, node.depth, next(counter), node.version, node))
+
+    def backup(node):
+        # Push a changed f-cost up through the ancestors.
+        while node is not None:
+            values = [child.f for child in node.children] + list(node.forgotten.values())
+            newF = max(node.f, min(values)) if values else float('inf')
+            if newF == node.f:
+                break
+
+            node.f = newF
+            if node.inFringe:
+                enqueue(node)
+
+            node = node.parent
+
+    def forget(node):
+        # Drop a leaf from memory, remembering its f-cost in its parent.
+        node.inFringe = False
+        if inMemory.get(node.state) is node:
+            del inMemory[node.state]
+
+        parent = node.parent
+        parent.children.remove(node)
+        parent.forgotten[node.state] = node.f
+        if node.f != float('inf'):
+            enqueue(parent)
+
+    enqueue(root)
+    while bestHeap:
+        (f, depth, count, version, node) = heapq.heappop(bestHeap)
+        if not node.inFringe or version != node.version:
+            stats.staleSkipped += 1
+            continue
+
+        if node.f == float('inf'):          # every remaining path is too long to fit in memory
+            break
+
+        if problem.isGoal(node.state):      # reached goal
+            actions = []
+            while node.parent is not None:
+                actions.append(node.action)
+                node = node.parent
+
+            actions.reverse()
+            break
+
+        # Generate every successor that is not already in memory
+        # (all of them the first time, otherwise only the forgotten ones).
+        firstExpansion = not node.children and not node.forgotten
+        stats.expanded += 1
+        for (state, action, cost) in successorStates(node.state):
+            if not firstExpansion and state not in node.forgotten:
+                continue
+
+            forgottenF = node.forgotten.get(state, 0)
+            if forgottenF == float('inf'):
+                continue                    # known dead end
+
+            node.forgotten.pop(state, None)
+            pathCost = node.pathCost + cost
+            other = inMemory.get(state)
+            if other is not None and other.pathCost <= pathCost:
+                continue                    # we already hold a path to it that is no worse
+
+            childF = max(node.f, forgottenF, pathCost + heuristic(state, problem))
+            if node.depth + 2 >= maxNodes and not problem.isGoal(state):
+                childF = float('inf')       # a path through this child can never fit
+
+            child = _MemoryNode(state, node, action, pathCost, childF)
+            node.children.append(child)
+            inMemory[state] = child
+            numNodes += 1
+            enqueue(child)
+            stats.generated += 1
+
+        stats.updateClosed(numNodes)
+
+        # All of this node's successors are in memory now, so it leaves the fringe.
+        node.inFringe = False
+        backup(node)
+
+        # A node without any children is a dead end.
+        while node is not root and not node.children and node.f == float('inf'):
+            parent = node.parent
+            forget(node)
+            numNodes -= 1
+            backup(parent)
+            node = parent
+
+        # Free memory by dropping the shallowest, highest f-cost leaves.
+        while numNodes > maxNodes and worstHeap:
+            (f, depth, count, version, leaf) = heapq.heappop(worstHeap)
+            if (not leaf.inFringe or version != leaf.version
+                    or leaf.children or leaf is root):
+                continue
+
+            forget(leaf)
+            numNodes -= 1
+
+        # Stale heap entries keep forgotten nodes alive, so clear them out now and then.
+        if len(bestHeap) + len(worstHeap) > 4 * maxNodes:
+            _compactHeap(bestHeap)
+            _compactHeap(worstHeap)
+
+        stats.updateFringe(len(bestHeap))
+
+    stats.finish(actions)
+    if actions is None:
+        raise Exception("No SMA* path available within %d nodes" % (maxNodes))
+
+    return actions
+
+def _compactHeap(heap):
+    """
+    Remove the out-of-date entries from one of `memoryBoundedAStarSearch`'s heaps (in place).
+    """
+
+    heap[:] = [entry for entry in heap if entry[4].inFringe and entry[3] == entry[4].version]
+    heapq.heapify(heap)
+
+ANYTIME_INITIAL_WEIGHT = 3.0
+ANYTIME_WEIGHT_STEP = 0.5
+
+def anytimeAStarSolutions(problem, heuristic, initialWeight = ANYTIME_INITIAL_WEIGHT,
+        weightStep = ANYTIME_WEIGHT_STEP, timeLimit = None, maxExpansions = None, stats = None):
+    """
+    ARA*: weighted A* that keeps improving its solution.
+    Yields (actions, cost, bound) every time the solution (or its bound) improves,
+    where the path cost is at most `bound` times the optimal cost.
+
+    The first search orders the fringe by g + w * h with w = `initialWeight`,
+    which finds a path quickly.
+    Then w drops by `weightStep` and the search continues from where it was:
+    states whose cost improved after they were expanded are kept aside (instead of being
+    re-expanded right away) and put back on the fringe for the next, less greedy round.
+    Once w reaches 1 (or the bound does), the last solution is optimal
+    (for a consistent heuristic).
+
+    `timeLimit` (in seconds) and `maxExpansions` stop the improvement early.
+    The first solution is always finished, whatever the budget.
+    """
+
+    stats = searchStats.begin(stats, 'anytimeAStarSearch')
+    heuristic = stats.wrapHeuristic(heuristic)
+    successorStates = stats.wrapSuccessors(problem.successorStates)
+
+    deadline = None
+    if timeLimit is not None:
+        deadline = time.perf_counter() + timeLimit
+
+    start = problem.startingState()
+    pathCosts = {start: 0}                          # state : best known g
+    parents = {start: None}                         # state : (parent, action)
+    hValues = {start: heuristic(start, problem)}
+    openStates = {start}
+    closed = set()
+    inconsistent = set()                            # closed states whose g improved since
+    counter = itertools.count()
+    stats.generated += 1
+
+    weight = max(1.0, initialWeight)
+    fringe = [(weight * hValues[start], next(counter), 0, start)]   # (g + w * h, count, g, state)
+
+    goal = None
+    goalCost = float('inf')
+    if problem.isGoal(start):
+        (goal, goalCost) = (start, 0)
+
+    numExpanded = 0
+    lastSolution = None
+    while True:
+        # Expand until nothing on the fringe could improve on the current solution.
+        outOfBudget = False
+        while fringe:
+            (key, count, pathCost, node) = fringe[0]
+            if node not in openStates or pathCost != pathCosts[node]:
+                heapq.heappop(fringe)
+                stats.staleSkipped += 1
+                continue
+
+            if goalCost <= key:
+                break
+
+            if goal is not None and ((deadline is not None and time.perf_counter() > deadline)
+                    or (maxExpansions is not None and numExpanded >= maxExpansions)):
+                outOfBudget = True
+                break
+
+            heapq.heappop(fringe)
+            openStates.remove(node)
+            closed.add(node)
+            numExpanded += 1
+            stats.expanded += 1
+
+            for (state, action, cost) in successorStates(node):
+                childCost = pathCost + cost
+                if childCost >= pathCosts.get(state, float('inf')):
+                    continue
+
+                pathCosts[state] = childCost
+                parents[state] = (node, action)
+                if childCost < goalCost and problem.isGoal(state):
+                    (goal, goalCost) = (state, childCost)
+
+                if state in closed:
+                    inconsistent.add(state)
+                    continue
+
+                if state not in hValues:
+                    hValues[state] = heuristic(state, problem)
+
+                openStates.add(state)
+                heapq.heappush(fringe,
+                        (childCost + weight * hValues[state], next(counter), childCost, state))
+                stats.generated += 1
+
+            stats.updateFringe(len(openStates))
+            stats.updateClosed(len(closed))
+
+        if goal is None:                    # the fringe emptied without reaching a goal
+            break
+
+        # The optimal cost is at least the smallest unweighted f on the fringe (or set aside).
+        # A round that ran to the end also guarantees the weight as a bound.
+        lowerBound = min([pathCosts[state] + hValues[state]
+                for state in itertools.chain(openStates, inconsistent)], default = goalCost)
+        bound = 1.0
+        if goalCost > lowerBound:
+            bound = float('inf')
+            if lowerBound > 0:
+                bound = goalCost / lowerBound
+
+        if not outOfBudget:
+            bound = min(bound, weight)
+
+        if lastSolution is not None:
+            bound = min(bound, lastSolution[2])
+
+        if lastSolution is None or goalCost < lastSolution[1] or bound < lastSolution[2]:
+            lastSolution = (_reconstructPath(parents, goal), goalCost, bound)
+            stats.recordSolution(goalCost, bound)
+            yield lastSolution
+
+        if bound <= 1.0 or weight <= 1.0 or outOfBudget:
+            break
+
+        # Next round: a smaller weight, with the set aside states back on the fringe.
+        weight = max(1.0, weight - weightStep)
+        openStates |= inconsistent
+        inconsistent = set()
+        closed = set()
+        fringe = [(pathCosts[state] + weight * hValues[state], next(counter), pathCosts[state],
+                state) for state in openStates]
+        heapq.heapify(fringe)
+
+    actions = None
+    if lastSolution is not None:
+        actions = lastSolution[0]
+
+    stats.finish(actions)
+    if actions is None:
+        raise Exception("No anytime A* path available")
+
+def anytimeAStarSearch(problem, heuristic, initialWeight = ANYTIME_INITIAL_WEIGHT,
+        weightStep = ANYTIME_WEIGHT_STEP, timeLimit = None, maxExpansions = None, stats = None):
+    """
+    Run `anytimeAStarSolutions` until it is done (or out of budget),
+    and return the best path it found.
+    Every intermediate solution's cost and bound is recorded in `stats.solutions`.
+    """
+
+    actions = None
+    for (actions, cost, bound) in anytimeAStarSolutions(problem, heuristic, initialWeight,
+            weightStep, timeLimit, maxExpansions, stats):
+        pass
+
+    return actions
+
+def jumpPointSearch(problem, stats = None):
+    """
+    Jump Point Search (the 4-connected variant) for a single goal on a grid with unit step costs.
+
+    Instead of pushing every neighbor, each move is followed in a straight line ("jumped")
+    until it reaches the goal, a wall, or a cell where the path could usefully turn
+    (a forced neighbor, or for vertical jumps, a row where a horizontal jump finds one).
+    Only those jump points go on the fringe, so the many equally short paths across open areas
+    are never expanded, and A* (with Manhattan distance) over the jump points still returns
+    a shortest path.
+
+    This needs the positions to be the states, `problem.walls`, and an explicit goal
+    (like `pacai.core.search.position.PositionSearchProblem` with its default cost).
+    Like `breadthFirstSearch`, step costs are assumed to all be 1.
+    Problems without a single goal or walls fall back to `breadthFirstSearch`.
+    """
+
+    goal = _singleGoal(problem)
+    walls = getattr(problem, 'walls', None)
+    if goal is None or walls is None:
+        return breadthFirstSearch(problem, stats = stats)
+
+    stats = searchStats.begin(stats, 'jumpPointSearch')
+
+    width = walls.getWidth()
+    height = walls.getHeight()
+
+    def isOpen(x, y):
+        return 0 <= x < width and 0 <= y < height and not walls[x][y]
+
+    def manhattan(position):
+        return abs(position[0] - goal[0]) + abs(position[1] - goal[1])
+
+    start = problem.startingState()
+    fringe = [(manhattan(start), 0, 0, start, None)]  # (f, g, count, position, (dx, dy))
+    parents = {start: None}                         # jump point : previous jump point
+    bestCost = {start: 0}
+    closed = set()
+    counter = itertools.count(1)
+    stats.generated += 1
+
+    found = False
+    while fringe:
+        (f, pathCost, count, node, direction) = heapq.heappop(fringe)
+        if node in closed or pathCost > bestCost[node]:
+            stats.staleSkipped += 1
+            continue
+
+        if node == goal:
+            found = True
+            break
+
+        closed.add(node)
+        stats.expanded += 1
+
+        for (dx, dy) in _jumpDirections(node, direction, isOpen):
+            jumpPoint = _jump(node, dx, dy, goal, isOpen)
+            if jumpPoint is None or jumpPoint in closed:
+                continue
+
+            childCost = pathCost + abs(jumpPoint[0] - node[0]) + abs(jumpPoint[1] - node[1])
+            if childCost >= bestCost.get(jumpPoint, float('inf')):
+                continue
+
+            bestCost[jumpPoint] = childCost
+            parents[jumpPoint] = node
+            heapq.heappush(fringe, (childCost + manhattan(jumpPoint), childCost, next(counter),
+                    jumpPoint, (dx, dy)))
+            stats.generated += 1
+
+        stats.updateFringe(len(fringe))
+
+    stats.updateClosed(len(closed))
+    actions = None
+    if found:
+        actions = _jumpPointActions(parents, goal)
+
+    stats.finish(actions)
+    if actions is None:
+        raise Exception("No JPS path available")
+
+    return actions
+
+def _jumpDirections(position, direction, isOpen):
+    """
+    The directions worth jumping in from a jump point, given the (dx, dy) we arrived with
+    (None at the start, where every direction is tried).
+    Going back the way we came is never needed, so only the two turns and straight ahead remain.
+    """
+
+    (x, y) = position
+    if direction is None:
+        candidates = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+    elif direction[0] != 0:
+        candidates = [(0, 1), (0, -1), direction]
+    else:
+        candidates = [(1, 0), (-1, 0), direction]
+
+    return [(dx, dy) for (dx, dy) in candidates if isOpen(x + dx, y + dy)]
+
+def _jump(position, dx, dy, goal, isOpen):
+    """
+    Move from `position` in the (dx, dy) direction until reaching a jump point, and return it
+    (or None if we run into a wall first).
+
+    Moving horizontally, a cell is a jump point if it is the goal or has a forced neighbor:
+    an open cell above or below it that was walled off above or below the previous cell.
+    Moving vertically, a cell is also a jump point if it has a forced neighbor to the left or
+    right, or if a horizontal jump out of it (in either direction) finds a jump point.
+    """
+
+    (x, y) = position
+    while True:
+        x += dx
+        y += dy
+        if not isOpen(x, y):
+            return None
+
+        if (x, y) == goal:
+            return (x, y)
+
+        if dx != 0:
+            if ((isOpen(x, y + 1) and not isOpen(x - dx, y + 1))
+                    or (isOpen(x, y - 1) and not isOpen(x - dx, y - 1))):
+                return (x, y)
+        else:
+            if ((isOpen(x + 1, y) and not isOpen(x + 1, y - dy))
+                    or (isOpen(x - 1, y) and not isOpen(x - 1, y - dy))):
+                return (x, y)
+
+            if (_jump((x, y), 1, 0, goal, isOpen) is not None
+                    or _jump((x, y), -1, 0, goal, isOpen) is not None):
+                return (x, y)
+
+def _jumpPointActions(parents, goal):
+    """
+    Expand the chain of jump points ending at `goal` back into single-step actions.
+    Consecutive jump points are always in a straight line.
+    """
+
+    actions = []
+    node = goal
+    while parents[node] is not None:
+        previous = parents[node]
+        dx = node[0] - previous[0]
+        dy = node[1] - previous[1]
+        if dx > 0:
+            actions += [Directions.EAST] * dx
+        elif dx < 0:
+            actions += [Directions.WEST] * -dx
+        elif dy > 0:
+            actions += [Directions.NORTH] * dy
+        else:
+            actions += [Directions.SOUTH] * -dy
+
+        node = previous
+
+    actions.reverse()
+    return actions
@@ -1,297 +1,832 @@
-"""
-This file contains incomplete versions of some agents that can be selected to control Pacman.
-You will complete their implementations.
-
-Good luck and happy searching!
-"""
-
-import logging
-
-from pacai.core import distance
-from pacai.core.actions import Actions
-from pacai.core.directions import Directions
-from pacai.core.search.position import PositionSearchProblem
-from pacai.core.search.problem import SearchProblem
-from pacai.agents.base import BaseAgent
-from pacai.agents.search.base import SearchAgent
-from pacai.student import search
-
-class CornersProblem(SearchProblem):
-    """
-    This search problem finds paths through all four corners of a layout.
-
-    You must select a suitable state space and successor function.
-    See the `pacai.core.search.position.PositionSearchProblem` class for an example of
-    a working SearchProblem.
-
-    Additional methods to implement:
-
-    `pacai.core.search.problem.SearchProblem.startingState`:
-    Returns the start state (in your search space,
-    NOT a `pacai.core.gamestate.AbstractGameState`).
-
-    `pacai.core.search.problem.SearchProblem.isGoal`:
-    Returns whether this search state is a goal state of the problem.
-
-    `pacai.core.search.problem.SearchProblem.successorStates`:
-    Returns successor states, the actions they require, and a cost of 1.
-    The following code snippet may prove useful:
-    ```
-        successors = []
-
-        for action in Directions.CARDINAL:
-            x, y = currentPosition
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            hitsWall = self.walls[nextx][nexty]
-
-            if (not hitsWall):
-                # Construct the successor.
-
-        return successors
-    ```
-    """
-
-    def __init__(self, startingGameState):
-        super().__init__()
-
-        self.walls = startingGameState.getWalls()
-        self.startingPosition = startingGameState.getPacmanPosition()
-        top = self.walls.getHeight() - 2
-        right = self.walls.getWidth() - 2
-
-        self.corners = ((1, 1), (1, top), (right, 1), (right, top))
-        for corner in self.corners:
-            if not startingGameState.hasFood(*corner):
-                logging.warning('Warning: no food in corner ' + str(corner))
-
-        self.cornersVisited = []    # goal
-        self.start = (self.startingPosition, self.cornersVisited)
-
-    def startingState(self):
-        return self.start
-
-    def isGoal(self, state):
-        if len(state[1]) >= 4:  # checks that 4 corners are visited
-            return True
-        else:
-            return False
-
-    def successorStates(self, state):
-        """
-        Returns successor states, the actions they require, and a cost of 1.
-        """
-
-        successors = []
-
-        for action in Directions.CARDINAL:
-            x, y = state[0]
-            dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            hitsWall = self.walls[nextx][nexty]
-
-            if (not hitsWall):
-                nextStateCoord = (nextx, nexty)
-                nextStateCorner = list(state[1]).copy()     # list of visited corners
-                if (nextx, nexty) in self.corners and (nextx, nexty) not in nextStateCorner:
-                    nextStateCorner.append((nextx, nexty))
-
-                successors.append(((nextStateCoord, tuple(nextStateCorner)), action, 1))
-
-        self._numExpanded += 1
-
-        return successors
-
-    def actionsCost(self, actions):
-        """
-        Returns the cost of a particular sequence of actions.
-        If those actions include an illegal move, return 999999.
-        This is implemented for you.
-        """
-
-        if (actions is None):
-            return 999999
-
-        x, y = self.startingPosition
-        for action in actions:
-            dx, dy = Actions.directionToVector(action)
-            x, y = int(x + dx), int(y + dy)
-            if self.walls[x][y]:
-                return 999999
-
-        return len(actions)
-
-def cornersHeuristic(state, problem):
-    """
-    A heuristic for the CornersProblem that you defined.
-
-    This function should always return a number that is a lower bound
-    on the shortest path from the state to a goal of the problem;
-    i.e. it should be admissible.
-    (You need not worry about consistency for this heuristic to receive full credit.)
-    """
-
-    # Useful information.
-    # corners = problem.corners  # These are the corner coordinates
-    # walls = problem.walls  # These are the walls of the maze, as a Grid.
-
-    position = state[0]
-    pacmanToCornerDist = []
-    for corner in problem.corners:
-        if corner not in state[1]:  # corner(s) not yet visited
-            # average of euclid and manhattan
-            pacmanToCornerDist.append(distance.manhattan(position, corner)
-                                      + distance.euclidean(position, corner) / 2)
-    if len(pacmanToCornerDist) < 1:     # edge case: all 4 corners visited (done)
-        return 0
-    else:
-        return min(pacmanToCornerDist)  # closest corner
-
-def foodHeuristic(state, problem):
-    """
-    Your heuristic for the FoodSearchProblem goes here.
-
-    This heuristic must be consistent to ensure correctness.
-    First, try to come up with an admissible heuristic;
-    almost all admissible heuristics will be consistent as well.
-
-    If using A* ever finds a solution that is worse than what uniform cost search finds,
-    your heuristic is *not* consistent, and probably not admissible!
-    On the other hand, inadmissible or inconsistent heuristics may find optimal solutions,
-    so be careful.
-
-    The state is a tuple (pacmanPosition, foodGrid) where foodGrid is a
-    `pacai.core.grid.Grid` of either True or False.
-    You can call `foodGrid.asList()` to get a list of food coordinates instead.
-
-    If you want access to info like walls, capsules, etc., you can query the problem.
-    For example, `problem.walls` gives you a Grid of where the walls are.
-
-    If you want to *store* information to be reused in other calls to the heuristic,
-    there is a dictionary called problem.heuristicInfo that you can use.
-    For example, if you only want to count the walls once and store that value, try:
-    ```
-    problem.heuristicInfo['wallCount'] = problem.walls.count()
-    ```
-    Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount'].
-    """
-
-    position, foodGrid = state
-
-    pacmanToFoodDist = []
-    for food in foodGrid.asList():      # food not yet eaten
-        pair = (position, food)
-        key = problem.heuristicInfo.get(pair)
-        if key:                         # already have distance between pos & food
-            pacmanToFoodDist.append(key)
-        else:                           # dont have distance between pos & food
-            d = distance.maze(position, food, problem.startingGameState)
-            problem.heuristicInfo[pair] = d
-            pacmanToFoodDist.append(d)
-
-    if len(pacmanToFoodDist) < 1:       # edge case: all food ate (done)
-        return 0
-    else:                               # farthest food
-        return max(pacmanToFoodDist)
-
-class ClosestDotSearchAgent(SearchAgent):
-    """
-    Search for all food using a sequence of searches.
-    """
-
-    def __init__(self, index, **kwargs):
-        super().__init__(index, **kwargs)
-
-    def registerInitialState(self, state):
-        self._actions = []
-        self._actionIndex = 0
-
-        currentState = state
-
-        while (currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState)  # The missing piece
-            self._actions += nextPathSegment
-
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' %
-                            (str(action), str(currentState)))
-
-                currentState = currentState.generateSuccessor(0, action)
-
-        logging.info('Path found with cost %d.' % len(self._actions))
-
-    def findPathToClosestDot(self, gameState):
-        """
-        Returns a path (a list of actions) to the closest dot, starting from gameState.
-        """
-
-        # Here are some useful elements of the startState
-        # startPosition = gameState.getPacmanPosition()
-        # food = gameState.getFood()
-        # walls = gameState.getWalls()
-        # problem = AnyFoodSearchProblem(gameState)
-
-        prob = AnyFoodSearchProblem(gameState)
-        return search.breadthFirstSearch(prob)
-
-class AnyFoodSearchProblem(PositionSearchProblem):
-    """
-    A search problem for finding a path to any food.
-
-    This search problem is just like the PositionSearchProblem,
-    but has a different goal test, which you need to fill in below.
-    The state space and successor function do not need to be changed.
-
-    The class definition above, `AnyFoodSearchProblem(PositionSearchProblem)`,
-    inherits the methods of `pacai.core.search.position.PositionSearchProblem`.
-
-    You can use this search problem to help you fill in
-    the `ClosestDotSearchAgent.findPathToClosestDot` method.
-
-    Additional methods to implement:
-
-    `pacai.core.search.position.PositionSearchProblem.isGoal`:
-    The state is Pacman's position.
-    Fill this in with a goal test that will complete the problem definition.
-    """
-
-    def __init__(self, gameState, start = None):
-        super().__init__(gameState, goal = None, start = start)
-
-        self.walls = gameState.getWalls()
-
-        self.startState = start
-        if (self.startState is None):
-            self.startState = gameState.getAgentPosition(0)
-
-        if (self.startState is None):
-            raise ValueError("Could not find starting location.")
-
-        # Store the food for later reference.
-        self.food = gameState.getFood()
-
-    def isGoal(self, state):
-        # print(state, self.food)
-        if not (state in self.food.asList()):
-            return False
-        else:
-            return True
-
-class ApproximateSearchAgent(BaseAgent):
-    """
-    Implement your contest entry here.
-
-    Additional methods to implement:
-
-    `pacai.agents.base.BaseAgent.getAction`:
-    Get a `pacai.bin.pacman.PacmanGameState`
-    and return a `pacai.core.directions.Directions`.
-
-    `pacai.agents.base.BaseAgent.registerInitialState`:
-    This method is called before any moves are made.
-    """
-
-    def __init__(self, index, **kwargs):
-        super().__init__(index, **kwargs)
+"""
+This file contains incomplete versions of some agents that can be selected to control Pacman.
+You will complete their implementations.
+
+Good luck and happy searching!
+"""
+
+import logging
+import random
+import time
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+from pacai.core.search.position import PositionSearchProblem
+from pacai.core.search.problem import SearchProblem
+from pacai.agents.base import BaseAgent
+from pacai.agents.search.base import SearchAgent
+from pacai.student import heuristicCache
+from pacai.student import mazeDistances
+from pacai.student import search
+
+class CornersProblem(SearchProblem):
+    """
+    This search problem finds paths through all four corners of a layout.
+
+    You must select a suitable state space and successor function.
+    See the `pacai.core.search.position.PositionSearchProblem` class for an example of
+    a working SearchProblem.
+
+    Additional methods to implement:
+
+    `pacai.core.search.problem.SearchProblem.startingState`:
+    Returns the start state (in your search space,
+    NOT a `pacai.core.gamestate.AbstractGameState`).
+
+    `pacai.core.search.problem.SearchProblem.isGoal`:
+    Returns whether this search state is a goal state of the problem.
+
+    `pacai.core.search.problem.SearchProblem.successorStates`:
+    Returns successor states, the actions they require, and a cost of 1.
+    The following code snippet may prove useful:
+    ```
+        successors = []
+
+        for action in Directions.CARDINAL:
+            x, y = currentPosition
+            dx, dy = Actions.directionToVector(action)
+            nextx, nexty = int(x + dx), int(y + dy)
+            hitsWall = self.walls[nextx][nexty]
+
+            if (not hitsWall):
+                # Construct the successor.
+
+        return successors
+    ```
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__()
+
+        self.walls = startingGameState.getWalls()
+        self.startingPosition = startingGameState.getPacmanPosition()
+        top = self.walls.getHeight() - 2
+        right = self.walls.getWidth() - 2
+
+        self.corners = ((1, 1), (1, top), (right, 1), (right, top))
+        for corner in self.corners:
+            if not startingGameState.hasFood(*corner):
+                logging.warning('Warning: no food in corner ' + str(corner))
+
+        # A state is (position, visitedCorners).
+        # The position is packed into one int (x * height + y),
+        # and the visited corners are a bitmask with bit i set once we reach self.corners[i].
+        self._height = self.walls.getHeight()
+        self._cornerBits = {}
+        for (i, corner) in enumerate(self.corners):
+            self._cornerBits[self.packPosition(corner)] = 1 << i
+        self._allCornersVisited = (1 << len(self.corners)) - 1
+
+        # For every open cell: (next position, action, corner bit of the next position).
+        self._neighbors = [None] * (self.walls.getWidth() * self._height)
+        for x in range(self.walls.getWidth()):
+            for y in range(self._height):
+                if self.walls[x][y]:
+                    continue
+
+                neighbors = []
+                for action in Directions.CARDINAL:
+                    dx, dy = Actions.directionToVector(action)
+                    nextx, nexty = int(x + dx), int(y + dy)
+                    if not self.walls[nextx][nexty]:
+                        nextPosition = self.packPosition((nextx, nexty))
+                        neighbors.append((nextPosition, action,
+                                self._cornerBits.get(nextPosition, 0)))
+
+                self._neighbors[self.packPosition((x, y))] = tuple(neighbors)
+
+        self.start = (self.packPosition(self.startingPosition), 0)
+
+        # Same as `pacai.core.search.food.FoodSearchProblem.heuristicInfo`.
+        self.heuristicInfo = {}
+
+    def packPosition(self, position):
+        """
+        Turn an (x, y) position into the int used in this problem's states.
+        """
+
+        return position[0] * self._height + position[1]
+
+    def unpackPosition(self, position):
+        """
+        Turn the int position of a state back into (x, y).
+        """
+
+        return divmod(position, self._height)
+
+    def startingState(self):
+        return self.start
+
+    def isGoal(self, state):
+        return state[1] == self._allCornersVisited     # checks that 4 corners are visited
+
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        (position, visited) = state
+        successors = [((nextPosition, visited | cornerBit), action, 1)
+                for (nextPosition, action, cornerBit) in self._neighbors[position]]
+
+        self._numExpanded += 1
+
+        return successors
+
+    def actionsCost(self, actions):
+        """
+        Returns the cost of a particular sequence of actions.
+        If those actions include an illegal move, return 999999.
+        This is implemented for you.
+        """
+
+        if (actions is None):
+            return 999999
+
+        x, y = self.startingPosition
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if self.walls[x][y]:
+                return 999999
+
+        return len(actions)
+
+def cornersHeuristic(state, problem):
+    """
+    A heuristic for the CornersProblem that you defined.
+
+    This function should always return a number that is a lower bound
+    on the shortest path from the state to a goal of the problem;
+    i.e. it should be admissible.
+    (You need not worry about consistency for this heuristic to receive full credit.)
+    """
+
+    # Useful information.
+    # corners = problem.corners  # These are the corner coordinates
+    # walls = problem.walls  # These are the walls of the maze, as a Grid.
+
+    distances = getMazeDistances(problem)
+    position = problem.unpackPosition(state[0])
+    pacmanToCornerDist = []
+    for (i, corner) in enumerate(problem.corners):
+        if not state[1] & (1 << i):     # corner(s) not yet visited
+            pacmanToCornerDist.append(distances.getDistance(position, corner))
+    if len(pacmanToCornerDist) < 1:     # edge case: all 4 corners visited (done)
+        return 0
+    else:
+        return max(pacmanToCornerDist)  # farthest corner
+
+def foodHeuristic(state, problem):
+    """
+    Your heuristic for the FoodSearchProblem goes here.
+
+    This heuristic must be consistent to ensure correctness.
+    First, try to come up with an admissible heuristic;
+    almost all admissible heuristics will be consistent as well.
+
+    If using A* ever finds a solution that is worse than what uniform cost search finds,
+    your heuristic is *not* consistent, and probably not admissible!
+    On the other hand, inadmissible or inconsistent heuristics may find optimal solutions,
+    so be careful.
+
+    The state is a tuple (pacmanPosition, foodGrid) where foodGrid is a
+    `pacai.core.grid.Grid` of either True or False.
+    You can call `foodGrid.asList()` to get a list of food coordinates instead.
+
+    If you want access to info like walls, capsules, etc., you can query the problem.
+    For example, `problem.walls` gives you a Grid of where the walls are.
+
+    If you want to *store* information to be reused in other calls to the heuristic,
+    there is a dictionary called problem.heuristicInfo that you can use.
+    For example, if you only want to count the walls once and store that value, try:
+    ```
+    problem.heuristicInfo['wallCount'] = problem.walls.count()
+    ```
+    Subsequent calls to this heuristic can access problem.heuristicInfo['wallCount'].
+    """
+
+    position, foodGrid = state
+    distances = getMazeDistances(problem)
+
+    foodIndexes = [distances.getIndex(food) for food in foodGrid.asList()]   # food not yet eaten
+    return foodTourBound(distances, distances.getIndex(position), foodIndexes,
+            problem.heuristicInfo)
+
+# Food bitmasks by grid object: id(foodGrid) -> (foodGrid, foodBits).
+# The grid is kept alongside its bits so a recycled id can never match a different grid.
+FOOD_BITS_MEMO_SIZE = 4096
+_foodBitsMemo = {}
+
+def foodStateKey(state):
+    """
+    A compact, hashable stand-in for a `FoodSearchProblem` state:
+    the position and a bitmask of the food (bit x * height + y for the food at (x, y)).
+
+    Use it to cache `foodHeuristic` for searches that revisit states (like IDA*):
+    `heuristicCache.CachedHeuristic(foodHeuristic, key = foodStateKey)`.
+    """
+
+    position, foodGrid = state
+    return (position, foodGridBits(foodGrid))
+
+def foodGridBits(foodGrid):
+    """
+    The bitmask of the food in a grid (bit x * height + y for the food at (x, y)).
+
+    It is built once per grid object,
+    and only visits the columns that still have food and the food within them.
+    """
+
+    memo = _foodBitsMemo.get(id(foodGrid))
+    if memo is not None and memo[0] is foodGrid:
+        return memo[1]
+
+    height = foodGrid.getHeight()
+    foodBits = 0
+    for x in range(foodGrid.getWidth()):
+        column = foodGrid[x]
+        if True not in column:
+            continue
+
+        y = column.index(True)
+        while True:
+            foodBits |= 1 << (x * height + y)
+            try:
+                y = column.index(True, y + 1)
+            except ValueError:
+                break
+
+    if len(_foodBitsMemo) >= FOOD_BITS_MEMO_SIZE:
+        _foodBitsMemo.clear()
+    _foodBitsMemo[id(foodGrid)] = (foodGrid, foodBits)
+
+    return foodBits
+
+def farthestFoodHeuristic(state, problem):
+    """
+    The maze distance to the farthest food.
+    Admissible, but much weaker than `foodHeuristic`;
+    kept so the two can be compared on the same layouts.
+    """
+
+    position, foodGrid = state
+    distances = getMazeDistances(problem)
+
+    pacmanToFoodDist = []
+    for food in foodGrid.asList():      # food not yet eaten
+        pacmanToFoodDist.append(distances.getDistance(position, food))
+
+    if len(pacmanToFoodDist) < 1:       # edge case: all food ate (done)
+        return 0
+    else:                               # farthest food
+        return max(pacmanToFoodDist)
+
+def foodTourBound(distances, position, foodIndexes, heuristicInfo, foodKey = None):
+    """
+    A lower bound on the length of any path from `position` that eats all the food at
+    `foodIndexes` (`pacai.student.mazeDistances.MazeDistances` indexes):
+    the maze distance to the closest food, plus the weight of a minimum spanning tree
+    over the food.
+
+    Any such path starts with a walk to some food (at least the closest),
+    and the rest of it connects all of the food (so it is at least the MST).
+    It is also consistent, since eating a pellet can only shrink the MST by the distance
+    from that pellet to the closest remaining one.
+
+    Spanning tree weights are memoized in heuristicInfo (in a bounded
+    `pacai.student.heuristicCache.LRUCache`), keyed on `foodKey`
+    (by default a bitmask of the food indexes),
+    so every state with the same food left (whatever the position) shares one computation.
+    """
+
+    if len(foodIndexes) == 0:           # edge case: all food ate (done)
+        return 0
+
+    closest = min([distances.getIndexDistance(position, food) for food in foodIndexes])
+    return closest + _spanningTreeWeight(distances, foodIndexes, heuristicInfo, foodKey)
+
+def _spanningTreeWeight(distances, foodIndexes, heuristicInfo, key):
+    """
+    Prim's algorithm over the food, using maze distances as edge weights.
+    """
+
+    if key is None:
+        key = 0
+        for food in foodIndexes:
+            key |= 1 << food
+
+    weights = heuristicInfo.get('spanningTreeWeights')
+    if weights is None:
+        weights = heuristicCache.LRUCache()
+        heuristicInfo['spanningTreeWeights'] = weights
+
+    weight = weights.get(key)
+    if weight is not None:
+        return weight
+
+    weight = 0
+    closestToTree = {food: distances.getIndexDistance(foodIndexes[0], food)
+            for food in foodIndexes[1:]}
+    while closestToTree:
+        food = min(closestToTree, key = closestToTree.get)
+        weight += closestToTree.pop(food)
+        for (other, d) in closestToTree.items():
+            closestToTree[other] = min(d, distances.getIndexDistance(food, other))
+
+    weights.put(key, weight)
+    return weight
+
+def getMazeDistances(problem):
+    """
+    Get the all-pairs maze distances (`pacai.student.mazeDistances.MazeDistances`)
+    for the problem's layout.
+    They are built once per layout, and kept in problem.heuristicInfo so that
+    heuristics can reach them with a single dictionary lookup.
+    """
+
+    distances = problem.heuristicInfo.get('mazeDistances')
+    if distances is None:
+        distances = mazeDistances.getMazeDistances(problem.walls)
+        problem.heuristicInfo['mazeDistances'] = distances
+
+    return distances
+
+class FoodBitsetSearchProblem(SearchProblem):
+    """
+    The same problem as `pacai.core.search.food.FoodSearchProblem` (eat all the food),
+    with a compact state.
+
+    A state is (position, foodBits):
+    position is Pacman's index in the layout's `pacai.student.mazeDistances.MazeDistances`,
+    and bit i of foodBits is set while self.food[i] has not been eaten.
+    States hash as two ints, a successor only clears one bit,
+    and heuristics can walk the remaining food with `iterBits` without building any lists.
+    """
+
+    def __init__(self, startingGameState):
+        super().__init__()
+
+        self.walls = startingGameState.getWalls()
+        self.startingGameState = startingGameState
+        self.startingPosition = startingGameState.getPacmanPosition()
+        self.heuristicInfo = {}
+
+        self.distances = mazeDistances.getMazeDistances(self.walls)
+        self.heuristicInfo['mazeDistances'] = self.distances
+
+        self.food = startingGameState.getFood().asList()
+        self.foodIndexes = [self.distances.getIndex(food) for food in self.food]
+        foodBits = {}
+        for (i, index) in enumerate(self.foodIndexes):
+            foodBits[index] = 1 << i
+
+        # For every open cell: (next position, action, mask that clears the next position's food).
+        allFood = (1 << len(self.food)) - 1
+        self._neighbors = []
+        for moves in self.distances.moves:
+            self._neighbors.append(tuple([(nextPosition, action,
+                    allFood & ~foodBits.get(nextPosition, 0)) for (nextPosition, action) in moves]))
+
+        self.start = (self.distances.getIndex(self.startingPosition), allFood)
+
+    def startingState(self):
+        return self.start
+
+    def isGoal(self, state):
+        return state[1] == 0
+
+    def successorStates(self, state):
+        """
+        Returns successor states, the actions they require, and a cost of 1.
+        """
+
+        (position, foodBits) = state
+        successors = [((nextPosition, foodBits & eatMask), action, 1)
+                for (nextPosition, action, eatMask) in self._neighbors[position]]
+
+        self._numExpanded += 1
+
+        return successors
+
+    def actionsCost(self, actions):
+        """
+        Returns the cost of a particular sequence of actions.
+        If those actions include an illegal move, return 999999.
+        """
+
+        if (actions is None):
+            return 999999
+
+        x, y = self.startingPosition
+        for action in actions:
+            dx, dy = Actions.directionToVector(action)
+            x, y = int(x + dx), int(y + dy)
+            if self.walls[x][y]:
+                return 999999
+
+        return len(actions)
+
+def foodBitsetHeuristic(state, problem):
+    """
+    `foodHeuristic` for the `FoodBitsetSearchProblem`.
+    The food bits themselves are the spanning tree memo key.
+    """
+
+    (position, foodBits) = state
+    foodIndexes = [problem.foodIndexes[i] for i in iterBits(foodBits)]
+    return foodTourBound(problem.distances, position, foodIndexes, problem.heuristicInfo,
+            foodBits)
+
+def popcount(bits):
+    """
+    The number of set bits (e.g. how much food is left in a `FoodBitsetSearchProblem` state).
+    """
+
+    return bin(bits).count('1')
+
+def iterBits(bits):
+    """
+    Yield the index of every set bit, lowest first.
+    """
+
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+class ClosestDotSearchAgent(SearchAgent):
+    """
+    Search for all food using a sequence of searches.
+    """
+
+    def __init__(self, index, **kwargs):
+        super().__init__(index, **kwargs)
+
+    def registerInitialState(self, state):
+        self._actions = []
+        self._actionIndex = 0
+
+        # Plan the whole tour on the maze distance table's cell graph,
+        # instead of a new search problem and game state for every dot.
+        distances = mazeDistances.getMazeDistances(state.getWalls())
+        food = [distances.getIndex(food) for food in state.getFood().asList()]
+        self._actions = closestDotTour(distances, distances.getIndex(state.getPacmanPosition()),
+                food)
+
+        logging.info('Path found with cost %d.' % len(self._actions))
+
+    def findPathToClosestDot(self, gameState):
+        """
+        Returns a path (a list of actions) to the closest dot, starting from gameState.
+        """
+
+        # Here are some useful elements of the startState
+        # startPosition = gameState.getPacmanPosition()
+        # food = gameState.getFood()
+        # walls = gameState.getWalls()
+        # problem = AnyFoodSearchProblem(gameState)
+
+        prob = AnyFoodSearchProblem(gameState)
+        return search.breadthFirstSearch(prob)
+
+def closestDotTour(distances, start, foodIndexes):
+    """
+    Returns the actions that repeatedly walk to the closest remaining dot until none are left,
+    exactly like chaining `ClosestDotSearchAgent.findPathToClosestDot`
+    (ties go to the same dot that `pacai.student.search.breadthFirstSearch` would pick).
+
+    Positions are `pacai.student.mazeDistances.MazeDistances` indexes.
+    The remaining food is a set, so goal tests are O(1),
+    and every BFS reuses the same parent buffers (a visit stamp per search marks which entries
+    are current, so nothing has to be cleared between segments).
+    """
+
+    food = set(foodIndexes)
+    food.discard(start)
+
+    parents = [0] * distances.size
+    parentActions = [None] * distances.size
+    stamps = [0] * distances.size
+    stamp = 0
+
+    actions = []
+    position = start
+    while food:
+        stamp += 1
+        stamps[position] = stamp
+
+        goal = None
+        layer = [position]
+        while layer and goal is None:
+            nextLayer = []
+            for index in layer:
+                for (nextIndex, action) in distances.moves[index]:
+                    if stamps[nextIndex] == stamp:
+                        continue
+
+                    stamps[nextIndex] = stamp
+                    parents[nextIndex] = index
+                    parentActions[nextIndex] = action
+                    if nextIndex in food:
+                        goal = nextIndex
+                        break
+
+                    nextLayer.append(nextIndex)
+
+                if goal is not None:
+                    break
+
+            layer = nextLayer
+
+        if goal is None:
+            raise Exception('There is food that cannot be reached from %s.'
+                    % (str(distances.positions[position])))
+
+        segment = []
+        index = goal
+        while index != position:
+            segment.append(parentActions[index])
+            index = parents[index]
+
+        segment.reverse()
+        actions += segment
+
+        food.discard(goal)
+        position = goal
+
+    return actions
+
+class AnyFoodSearchProblem(PositionSearchProblem):
+    """
+    A search problem for finding a path to any food.
+
+    This search problem is just like the PositionSearchProblem,
+    but has a different goal test, which you need to fill in below.
+    The state space and successor function do not need to be changed.
+
+    The class definition above, `AnyFoodSearchProblem(PositionSearchProblem)`,
+    inherits the methods of `pacai.core.search.position.PositionSearchProblem`.
+
+    You can use this search problem to help you fill in
+    the `ClosestDotSearchAgent.findPathToClosestDot` method.
+
+    Additional methods to implement:
+
+    `pacai.core.search.position.PositionSearchProblem.isGoal`:
+    The state is Pacman's position.
+    Fill this in with a goal test that will complete the problem definition.
+    """
+
+    def __init__(self, gameState, start = None):
+        super().__init__(gameState, goal = None, start = start)
+
+        self.walls = gameState.getWalls()
+
+        self.startState = start
+        if (self.startState is None):
+            self.startState = gameState.getAgentPosition(0)
+
+        if (self.startState is None):
+            raise ValueError("Could not find starting location.")
+
+        # Store the food for later reference.
+        self.food = gameState.getFood()
+        self._foodPositions = set(self.food.asList())
+
+    def isGoal(self, state):
+        return state in self._foodPositions
+
+class ApproximateSearchAgent(BaseAgent):
+    """
+    Implement your contest entry here.
+
+    Additional methods to implement:
+
+    `pacai.agents.base.BaseAgent.getAction`:
+    Get a `pacai.bin.pacman.PacmanGameState`
+    and return a `pacai.core.directions.Directions`.
+
+    `pacai.agents.base.BaseAgent.registerInitialState`:
+    This method is called before any moves are made.
+
+    DESCRIPTION:
+    All of the planning happens in registerInitialState, within `planningTime` seconds
+    (an agent argument, e.g. `-a planningTime=2`).
+    The food is treated as a travelling salesman path from Pacman's start over
+    maze distances (`pacai.student.mazeDistances`):
+    a nearest-neighbor tour is improved with 2-opt and Or-opt moves until it is locally optimal,
+    and any time left over goes to random double-bridge kicks followed by more local search,
+    keeping the best tour found.
+    getAction just replays the tour's moves.
+    """
+
+    def __init__(self, index, planningTime = 1.0, **kwargs):
+        super().__init__(index, **kwargs)
+
+        self.planningTime = float(planningTime)
+        self._actions = []
+        self._actionIndex = 0
+
+    def registerInitialState(self, state):
+        deadline = time.time() + self.planningTime
+
+        distances = mazeDistances.getMazeDistances(state.getWalls())
+        start = distances.getIndex(state.getPacmanPosition())
+
+        food = []
+        for position in state.getFood().asList():
+            index = distances.getIndex(position)
+            if distances.getIndexDistance(start, index) != float('inf'):
+                food.append(index)
+
+        tour = planFoodTour(distances, start, food, deadline)
+        self._actions = tourActions(distances, start, tour)
+        self._actionIndex = 0
+
+        logging.info('Path found with cost %d.' % len(self._actions))
+
+    def getAction(self, state):
+        if (self._actionIndex >= len(self._actions)):
+            return Directions.STOP
+
+        action = self._actions[self._actionIndex]
+        self._actionIndex += 1
+
+        return action
+
+def planFoodTour(distances, start, foodIndexes, deadline):
+    """
+    Order the food (`pacai.student.mazeDistances.MazeDistances` indexes) into a short path
+    that starts at `start`, stopping local search once time.time() passes `deadline`.
+
+    Internally the path is [start, food..., end], where `end` is a dummy stop that is
+    zero distance from everything, so the open path can use the usual closed-tour moves
+    with both ends pinned.
+    """
+
+    if len(foodIndexes) < 2:
+        return list(foodIndexes)
+
+    # A small local matrix: row i is node i, with node 0 as the start and the last as the end.
+    nodes = [start] + list(foodIndexes)
+    matrix = [[distances.getIndexDistance(a, b) for b in nodes] + [0] for a in nodes]
+    matrix.append([0] * (len(nodes) + 1))
+    end = len(nodes)
+
+    tour = _nearestNeighborTour(matrix, end)
+    _improveTour(matrix, tour, deadline)
+
+    bestTour = tour
+    bestLength = _tourLength(matrix, tour)
+    while time.time() < deadline and len(tour) > 5:
+        tour = _doubleBridge(bestTour)
+        _improveTour(matrix, tour, deadline)
+
+        length = _tourLength(matrix, tour)
+        if length < bestLength:
+            bestTour = tour
+            bestLength = length
+
+    return [nodes[node] for node in bestTour[1:-1]]
+
+def tourActions(distances, start, tour):
+    """
+    The actions that walk the tour in order.
+    Food that we happen to walk over on the way to another target is not visited again.
+    """
+
+    actions = []
+    eaten = set()
+    position = start
+    for target in tour:
+        if target in eaten:
+            continue
+
+        for (position, action) in mazePath(distances, position, target):
+            actions.append(action)
+            eaten.add(position)
+
+    return actions
+
+def mazePath(distances, source, target):
+    """
+    A shortest path between two `pacai.student.mazeDistances.MazeDistances` indexes,
+    as a list of (position entered, action), by always stepping to a cell one closer to target.
+    """
+
+    path = []
+    while source != target:
+        remaining = distances.getIndexDistance(source, target)
+        for (nextIndex, action) in distances.moves[source]:
+            if distances.getIndexDistance(nextIndex, target) == remaining - 1:
+                path.append((nextIndex, action))
+                source = nextIndex
+                break
+
+    return path
+
+def _tourLength(matrix, tour):
+    return sum([matrix[tour[i]][tour[i + 1]] for i in range(len(tour) - 1)])
+
+def _nearestNeighborTour(matrix, end):
+    """
+    Start at node 0 and keep going to the closest unvisited node, then finish at `end`.
+    """
+
+    tour = [0]
+    remaining = set(range(1, end))
+    while remaining:
+        row = matrix[tour[-1]]
+        closest = min(remaining, key = lambda node: row[node])
+        remaining.remove(closest)
+        tour.append(closest)
+
+    tour.append(end)
+    return tour
+
+def _improveTour(matrix, tour, deadline):
+    """
+    Apply improving 2-opt and Or-opt moves (in place) until neither finds one,
+    or we run out of time.
+    """
+
+    improved = True
+    while improved and time.time() < deadline:
+        improved = _twoOpt(matrix, tour, deadline)
+        improved = _orOpt(matrix, tour, deadline) or improved
+
+def _twoOpt(matrix, tour, deadline):
+    """
+    Reverse tour[i..j] whenever that shortens the tour (first improvement).
+    """
+
+    improved = False
+    for i in range(1, len(tour) - 2):
+        if time.time() >= deadline:
+            break
+
+        for j in range(i + 1, len(tour) - 1):
+            a, b, c, d = tour[i - 1], tour[i], tour[j], tour[j + 1]
+            if matrix[a][c] + matrix[b][d] < matrix[a][b] + matrix[c][d]:
+                tour[i:j + 1] = reversed(tour[i:j + 1])
+                improved = True
+
+    return improved
+
+def _orOpt(matrix, tour, deadline):
+    """
+    Move a run of 1-3 consecutive nodes (either way round) to a cheaper spot in the tour.
+    """
+
+    improved = False
+    for length in (1, 2, 3):
+        i = 1
+        while i + length < len(tour):
+            if time.time() >= deadline:
+                return improved
+
+            first, last = tour[i], tour[i + length - 1]
+            previous, following = tour[i - 1], tour[i + length]
+            removeGain = (matrix[previous][first] + matrix[last][following]
+                    - matrix[previous][following])
+
+            move = None
+            for j in range(len(tour) - 1):
+                if i - 1 <= j < i + length:
+                    continue
+
+                a, b = tour[j], tour[j + 1]
+                forward = matrix[a][first] + matrix[last][b] - matrix[a][b]
+                backward = matrix[a][last] + matrix[first][b] - matrix[a][b]
+                if forward < removeGain and (move is None or forward < move[0]):
+                    move = (forward, j, False)
+                if backward < removeGain and (move is None or backward < move[0]):
+                    move = (backward, j, True)
+
+            if move is None:
+                i += 1
+                continue
+
+            (cost, j, reverse) = move
+            segment = tour[i:i + length]
+            if reverse:
+                segment.reverse()
+
+            # Insert after tour[j], accounting for the segment being cut out first.
+            anchor = tour[j]
+            del tour[i:i + length]
+            position = tour.index(anchor) + 1
+            tour[position:position] = segment
+            improved = True
+
+    return improved
+
+def _doubleBridge(tour):
+    """
+    A random double-bridge kick: cut the inside of the tour into A B C D and reconnect A C B D.
+    """
+
+    cuts = sorted(random.sample(range(1, len(tour) - 1), 3))
+    (i, j, k) = cuts
+    return tour[:i] + tour[j:k] + tour[i:j] + tour[k:]
@@ -0,0 +1,302 @@
+"""
+Benchmark the searches in `pacai.student.search` on generated mazes.
+
+Every (algorithm, heuristic, problem) combination is run on mazes of growing size,
+recording time, node counts, path cost, and peak memory
+(tracemalloc, in a second run so tracing does not slow down the timed one).
+The results are printed as a table, and can be saved as a baseline
+that later runs are checked against (exiting non-zero on a regression).
+
+The mazes are generated here from a seed, so no layout files (or network) are needed:
+```
+python -m pacai.student.searchBenchmark --save-baseline searchBaseline.json
+python -m pacai.student.searchBenchmark --baseline searchBaseline.json
+```
+"""
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+import tracemalloc
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import Layout
+from pacai.core.search import heuristic
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.position import PositionSearchProblem
+from pacai.student import search
+from pacai.student import searchAgents
+from pacai.student.searchStats import SearchStats
+
+DEFAULT_SIZES = [5, 10, 15, 20]
+DEFAULT_FOOD = 6
+DEFAULT_LOOP_FRACTION = 0.1
+
+# Baseline checks: how much worse than the baseline a run may be before it counts as a regression.
+DEFAULT_TOLERANCE = 0.05
+DEFAULT_TIME_FACTOR = 3.0
+
+# (problem name, problem factory, layout kind, uninformed searches, [(heuristic name, heuristic)])
+# Uninformed searches are only run where the state space stays small enough to finish.
+PROBLEMS = [
+    ('position', PositionSearchProblem, 'position',
+            ['depthFirstSearch', 'breadthFirstSearch', 'uniformCostSearch',
+                'bidirectionalBreadthFirstSearch', 'jumpPointSearch'],
+            [('null', heuristic.null), ('manhattan', heuristic.manhattan)]),
+    ('corners', searchAgents.CornersProblem, 'corners',
+            ['depthFirstSearch', 'breadthFirstSearch', 'uniformCostSearch'],
+            [('null', heuristic.null), ('cornersHeuristic', searchAgents.cornersHeuristic)]),
+    ('food', FoodSearchProblem, 'food',
+            ['breadthFirstSearch', 'uniformCostSearch'],
+            [('farthestFoodHeuristic', searchAgents.farthestFoodHeuristic),
+                ('foodHeuristic', searchAgents.foodHeuristic)]),
+    ('foodBitset', searchAgents.FoodBitsetSearchProblem, 'food',
+            ['breadthFirstSearch', 'uniformCostSearch'],
+            [('foodBitsetHeuristic', searchAgents.foodBitsetHeuristic)]),
+]
+
+INFORMED_SEARCHES = ['aStarSearch', 'anytimeAStarSearch']
+POSITION_INFORMED_SEARCHES = ['aStarSearch', 'anytimeAStarSearch', 'bidirectionalAStarSearch']
+
+def generateMaze(size, kind, seed, numFood = DEFAULT_FOOD, loopFraction = DEFAULT_LOOP_FRACTION):
+    """
+    Generate the text of a size x size cell maze (a (2 * size + 1) square layout).
+
+    The maze is carved with a randomized depth-first search,
+    then `loopFraction` of the remaining inner walls are knocked out so there are cycles.
+    `kind` places the food:
+    'position' has none (Pacman goes from the top right to (1, 1)),
+    'corners' has one in each corner, and 'food' has `numFood` random pellets.
+    """
+
+    rng = random.Random('%s-%d-%d' % (kind, size, seed))
+    width = 2 * size + 1
+    cells = [['%'] * width for row in range(width)]
+
+    # Carve the maze (cell (i, j) sits at (2i + 1, 2j + 1)).
+    stack = [(0, 0)]
+    cells[1][1] = ' '
+    while stack:
+        (i, j) = stack[-1]
+        options = [(i + di, j + dj) for (di, dj) in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                if 0 <= i + di < size and 0 <= j + dj < size
+                and cells[2 * (j + dj) + 1][2 * (i + di) + 1] == '%']
+        if not options:
+            stack.pop()
+            continue
+
+        (ni, nj) = rng.choice(options)
+        cells[2 * nj + 1][2 * ni + 1] = ' '
+        cells[j + nj + 1][i + ni + 1] = ' '
+        stack.append((ni, nj))
+
+    # Knock out some inner walls to add loops.
+    innerWalls = [(x, y) for x in range(1, width - 1) for y in range(1, width - 1)
+            if cells[y][x] == '%' and (x % 2 == 1) != (y % 2 == 1)]
+    for (x, y) in rng.sample(innerWalls, int(len(innerWalls) * loopFraction)):
+        cells[y][x] = ' '
+
+    # Rows are listed top first, so row 1 is the top of the maze and row (width - 2) the bottom.
+    top, bottom, right = 1, width - 2, width - 2
+    if kind == 'corners':
+        for (x, y) in ((1, top), (1, bottom), (right, top), (right, bottom)):
+            cells[y][x] = '.'
+        middle = 2 * (size // 2) + 1
+        cells[middle][middle] = 'P'
+    elif kind == 'food':
+        openCells = [(x, y) for x in range(1, width - 1) for y in range(1, width - 1)
+                if cells[y][x] == ' ' and (x, y) != (1, bottom)]
+        for (x, y) in rng.sample(openCells, min(numFood, len(openCells))):
+            cells[y][x] = '.'
+        cells[bottom][1] = 'P'
+    else:
+        cells[top][right] = 'P'
+
+    return [''.join(row) for row in cells]
+
+def runOne(algorithm, heuristicFunction, problemFactory, gameState, **tags):
+    """
+    Run one search and return its `pacai.student.searchStats.SearchStats` as a dict,
+    plus the path cost and peak traced memory.
+
+    tracemalloc slows allocation-heavy searches down many times over,
+    so the search is run twice on fresh problems:
+    once traced for the peak memory, then untraced for the time and counts.
+    The traced run goes first, so tables built once per layout (like maze distances)
+    are not charged to whichever timed run happens to need them first.
+    """
+
+    tracemalloc.start()
+    try:
+        _search(algorithm, heuristicFunction, problemFactory(gameState), SearchStats(**tags))
+    except Exception:
+        pass                                # logged by the timed run
+    finally:
+        peakMemory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    stats = SearchStats(**tags)
+    try:
+        actions = _search(algorithm, heuristicFunction, problemFactory(gameState), stats)
+    except Exception as ex:
+        logging.warning('%s failed on %s: %s' % (algorithm, tags, ex))
+        actions = None
+
+    result = stats.toDict()
+    result['peakMemory'] = peakMemory
+    result['pathCost'] = None
+    if actions is not None:                 # every benchmark problem has unit step costs
+        result['pathCost'] = len(actions)
+
+    return result
+
+def _search(algorithm, heuristicFunction, problem, stats):
+    searchFunction = getattr(search, algorithm)
+    if heuristicFunction is None:
+        return searchFunction(problem, stats = stats)
+
+    return searchFunction(problem, heuristicFunction, stats = stats)
+
+def runAll(sizes, seed, numFood):
+    results = []
+    for size in sizes:
+        layouts = {}
+        for kind in ('position', 'corners', 'food'):
+            layouts[kind] = PacmanGameState(Layout(generateMaze(size, kind, seed, numFood)))
+
+        for (problemName, problemFactory, kind, uninformed, heuristics) in PROBLEMS:
+            informed = INFORMED_SEARCHES
+            if problemName == 'position':
+                informed = POSITION_INFORMED_SEARCHES
+
+            runs = [(algorithm, 'none', None) for algorithm in uninformed]
+            runs += [(algorithm, name, function)
+                    for algorithm in informed for (name, function) in heuristics]
+
+            for (algorithm, heuristicName, heuristicFunction) in runs:
+                startTime = time.perf_counter()
+                result = runOne(algorithm, heuristicFunction, problemFactory, layouts[kind],
+                        problem = problemName, heuristic = heuristicName, size = size)
+                logging.info('%-32s %-22s %-11s %3d  %.2fs' % (algorithm, heuristicName,
+                        problemName, size, time.perf_counter() - startTime))
+                results.append(result)
+
+    return results
+
+def resultKey(result):
+    return '%s/%s/%s/%d' % (result['problem'], result['algorithm'], result['heuristic'],
+            result['size'])
+
+def formatTable(results):
+    header = ('%-11s %4s  %-32s %-22s %9s %9s %8s %9s %10s'
+            % ('problem', 'size', 'algorithm', 'heuristic', 'expanded', 'fringe', 'cost',
+                'time (s)', 'memory (KB)'))
+    lines = [header, '-' * len(header)]
+    for result in results:
+        lines.append('%-11s %4d  %-32s %-22s %9d %9d %8s %9.3f %10.1f' % (
+                result['problem'], result['size'], result['algorithm'], result['heuristic'],
+                result['expanded'], result['peakFringe'], result['pathCost'],
+                result['wallTime'], result['peakMemory'] / 1024.0))
+
+    return '\n'.join(lines)
+
+def compareToBaseline(results, baseline, tolerance = DEFAULT_TOLERANCE,
+        timeFactor = DEFAULT_TIME_FACTOR):
+    """
+    Returns a list of regression messages (empty if everything is at least as good as baseline).
+
+    Path costs may never get worse, expansions and memory may grow by at most `tolerance`,
+    and (since timing is noisy) wall time may grow by at most `timeFactor`.
+    Every baseline run that is missing from `results` (removed or renamed) is a regression too.
+    """
+
+    regressions = []
+    keys = set([resultKey(result) for result in results])
+    for key in sorted(baseline):
+        if key not in keys:
+            regressions.append('%s: missing from the results' % (key))
+
+    for result in results:
+        key = resultKey(result)
+        old = baseline.get(key)
+        if old is None:
+            continue
+
+        if result['pathCost'] is None and old['pathCost'] is not None:
+            regressions.append('%s: no longer finds a path' % (key))
+            continue
+
+        if old['pathCost'] is not None and result['pathCost'] > old['pathCost']:
+            regressions.append('%s: path cost %s -> %s' % (key, old['pathCost'],
+                    result['pathCost']))
+
+        for field in ('expanded', 'peakMemory'):
+            if result[field] > old[field] * (1.0 + tolerance):
+                regressions.append('%s: %s %d -> %d' % (key, field, old[field], result[field]))
+
+        # Very short runs are all noise.
+        if old['wallTime'] > 0.01 and result['wallTime'] > old['wallTime'] * timeFactor:
+            regressions.append('%s: wallTime %.3f -> %.3f' % (key, old['wallTime'],
+                    result['wallTime']))
+
+    return regressions
+
+def main(argv):
+    parser = argparse.ArgumentParser(description = __doc__.strip().split('\n')[0])
+    parser.add_argument('--sizes', type = int, nargs = '+', default = DEFAULT_SIZES,
+            help = 'maze sizes to run, in cells per side (default: %(default)s)')
+    parser.add_argument('--seed', type = int, default = 0,
+            help = 'seed for the generated mazes (default: %(default)s)')
+    parser.add_argument('--food', type = int, default = DEFAULT_FOOD,
+            help = 'pellets in the food mazes (default: %(default)s)')
+    parser.add_argument('--output', default = None,
+            help = 'also write every run as a JSON line to this file')
+    parser.add_argument('--baseline', default = None,
+            help = 'baseline file to check the results against')
+    parser.add_argument('--save-baseline', dest = 'saveBaseline', default = None,
+            help = 'write the results as a new baseline file')
+    parser.add_argument('--tolerance', type = float, default = DEFAULT_TOLERANCE,
+            help = 'allowed growth in expansions and memory (default: %(default)s)')
+    parser.add_argument('--time-factor', dest = 'timeFactor', type = float,
+            default = DEFAULT_TIME_FACTOR,
+            help = 'allowed growth factor in wall time (default: %(default)s)')
+    parser.add_argument('--verbose', action = 'store_true', help = 'log every run as it ends')
+    options = parser.parse_args(argv)
+
+    logging.basicConfig(level = logging.INFO if options.verbose else logging.WARNING,
+            format = '%(message)s')
+
+    results = runAll(options.sizes, options.seed, options.food)
+    print(formatTable(results))
+
+    if options.output is not None:
+        with open(options.output, 'w') as out:
+            for result in results:
+                out.write(json.dumps(result, sort_keys = True) + '\n')
+
+    if options.saveBaseline is not None:
+        with open(options.saveBaseline, 'w') as out:
+            json.dump({resultKey(result): result for result in results}, out,
+                    indent = 4, sort_keys = True)
+
+    if options.baseline is not None:
+        with open(options.baseline, 'r') as file:
+            baseline = json.load(file)
+
+        regressions = compareToBaseline(results, baseline, options.tolerance,
+                options.timeFactor)
+        if regressions:
+            print('\n%d regression(s) against %s:' % (len(regressions), options.baseline))
+            for regression in regressions:
+                print('    ' + regression)
+            return 1
+
+        print('\nNo regressions against %s.' % (options.baseline))
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
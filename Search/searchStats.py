@@ -0,0 +1,161 @@
+"""
+Per-run statistics for the searches in `pacai.student.search`.
+"""
+
+import json
+import logging
+import time
+
+class SearchStats(object):
+    """
+    Counters and timings for one search run.
+
+    Pass one as the `stats` keyword of any search in `pacai.student.search`
+    (e.g. `search.aStarSearch(problem, heuristic, stats = stats)`) and it is filled in:
+
+     - generated: nodes put on the fringe (including the start).
+     - expanded: nodes whose successors were generated.
+     - staleSkipped: fringe entries popped and thrown away (already expanded, or superseded).
+     - peakFringe / peakClosed: the most nodes on the fringe / in the closed set at once.
+       IDA* has no fringe or closed set, so it reports its deepest path for both,
+       and SMA* reports every node it holds in memory as closed.
+     - heuristicCalls / heuristicTime and successorCalls / successorTime:
+       how often (and how many seconds) the heuristic and `successorStates` ran.
+       These are only measured when `timed` is True, since timing every call has a cost.
+     - wallTime: seconds for the whole search.
+     - solutionLength: the number of actions returned (None if the search failed).
+     - solutions: for anytime searches, a (cost, suboptimality bound, seconds) triple
+       for every improved solution, in the order they were found.
+
+    `tags` is a dict for anything else worth recording with the run (layout, problem, etc.).
+    """
+
+    def __init__(self, timed = True, **tags):
+        self.timed = timed
+        self.tags = tags
+
+        self.algorithm = None
+        self.generated = 0
+        self.expanded = 0
+        self.staleSkipped = 0
+        self.peakFringe = 0
+        self.peakClosed = 0
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.successorCalls = 0
+        self.successorTime = 0.0
+        self.wallTime = 0.0
+        self.solutionLength = None
+        self.solutions = []
+
+        self._startTime = None
+
+    def begin(self, algorithm):
+        self.algorithm = algorithm
+        self._startTime = time.perf_counter()
+
+    def finish(self, actions):
+        self.wallTime = time.perf_counter() - self._startTime
+        if actions is not None:
+            self.solutionLength = len(actions)
+
+        logging.debug('%s expanded %d nodes (%d stale fringe entries skipped) in %.3f seconds.'
+                % (self.algorithm, self.expanded, self.staleSkipped, self.wallTime))
+
+    def recordSolution(self, cost, bound):
+        seconds = time.perf_counter() - self._startTime
+        self.solutions.append((cost, bound, seconds))
+
+        logging.debug('%s found a cost %s solution (at most %.3f times optimal) in %.3f seconds.'
+                % (self.algorithm, cost, bound, seconds))
+
+    def updateFringe(self, size):
+        if size > self.peakFringe:
+            self.peakFringe = size
+
+    def updateClosed(self, size):
+        if size > self.peakClosed:
+            self.peakClosed = size
+
+    def wrapHeuristic(self, heuristic):
+        """
+        Returns a heuristic that counts and times its calls into these stats
+        (or the heuristic itself if we are not timing).
+        """
+
+        if not self.timed:
+            return heuristic
+
+        def timedHeuristic(state, problem):
+            startTime = time.perf_counter()
+            value = heuristic(state, problem)
+            self.heuristicTime += time.perf_counter() - startTime
+            self.heuristicCalls += 1
+            return value
+
+        return timedHeuristic
+
+    def wrapSuccessors(self, successorStates):
+        """
+        Returns a successor function that counts and times its calls into these stats
+        (or the function itself if we are not timing).
+        """
+
+        if not self.timed:
+            return successorStates
+
+        def timedSuccessors(state):
+            startTime = time.perf_counter()
+            successors = successorStates(state)
+            self.successorTime += time.perf_counter() - startTime
+            self.successorCalls += 1
+            return successors
+
+        return timedSuccessors
+
+    def toDict(self):
+        values = dict(self.tags)
+        values.update({
+            'algorithm': self.algorithm,
+            'generated': self.generated,
+            'expanded': self.expanded,
+            'staleSkipped': self.staleSkipped,
+            'peakFringe': self.peakFringe,
+            'peakClosed': self.peakClosed,
+            'heuristicCalls': self.heuristicCalls,
+            'heuristicTime': self.heuristicTime,
+            'successorCalls': self.successorCalls,
+            'successorTime': self.successorTime,
+            'wallTime': self.wallTime,
+            'solutionLength': self.solutionLength,
+            'solutions': list(self.solutions),
+        })
+
+        return values
+
+    def toJSON(self):
+        return json.dumps(self.toDict(), sort_keys = True)
+
+    def writeJSONLine(self, file):
+        """
+        Append these stats as one JSON line to an open file or a path.
+        """
+
+        if isinstance(file, str):
+            with open(file, 'a') as out:
+                out.write(self.toJSON() + '\n')
+        else:
+            file.write(self.toJSON() + '\n')
+
+def begin(stats, algorithm):
+    """
+    Start recording a search into `stats`.
+    Searches that were not given any stats still count into an untimed throwaway instance,
+    so they do not need a separate code path.
+    """
+
+    if stats is None:
+        stats = SearchStats(timed = False)
+
+    stats.begin(algorithm)
+    return stats